@@ -1,24 +1,98 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 
-# Function to save orders to a CSV file
-def save_orders(order_data):
-    order_data.to_csv("orders.csv", index=False)
+from backtest import backtest_pairs
+from instrumentation import RerunProfiler, memory_tracing_requested, profiling_requested
+from market_data import MarketDataStore
+from order_journal import OrderJournal
+from order_store import OrderStore
+from order_view import query_orders, with_market
+from pricing import MarketSnapshot, market_for_tenor, pip_size, price_grid, price_ideas
+from quote_stream import QuoteEvent, QuoteService, tick_source
+from risk import RiskBook
+from structures import (IDEA_COLUMNS, STRIKE_COLUMNS, STRUCTURES, evaluate, evaluate_ideas, generate_ideas,
+                        normalize_ideas)
 
-# Function to load orders from a CSV file
-def load_orders():
-    try:
-        return pd.read_csv("orders.csv")
-    except FileNotFoundError:
-        return pd.DataFrame(columns=['Client Name', 'CCY Pair', 'Structure', 'Liquidity Provider', 'Level', 'Client Fill Level'])
+# Largest strike grid the Batch Ideas generator prices, and how many ranked ideas it shows
+MAX_GRID_IDEAS = 200_000
+GRID_IDEAS_SHOWN = 500
 
-# Load orders from the CSV file when the app starts
-order_data = load_orders()
+# Most orders listed in the Remove Specific Orders picker
+REMOVE_PICKER_LIMIT = 200
+
+# Currency pairs traded on the desk
+CURRENCY_PAIRS = ["USDJPY", "EURUSD", "GBPUSD", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD", "EURGBP", "EURJPY", "GBPJPY", "AUDJPY", "AUDNZD", "EURAUD", "CHFJPY", "USDSEK", "USDNOK", "USDMXN", "USDCNH", "USDTWD", "USDKRW", "USDSGD", "USDZAR", "USDTRY", "USDINR"]
+
+# Open the order journal once per server process and import the legacy CSV on first run
+@st.cache_resource
+def get_journal():
+    journal = OrderJournal("orders.db")
+    journal.import_csv("orders.csv")
+    return journal
+
+# In-memory order book shared across reruns and sessions, updated incrementally from the journal
+@st.cache_resource
+def get_order_store():
+    return OrderStore(get_journal())
+
+# Local market-data cache (spot, forward and vol snapshots) shared across reruns and sessions
+@st.cache_resource
+def get_market_data():
+    return MarketDataStore("data/market")
+
+# Background quote service watching working order levels, shared across reruns and sessions
+@st.cache_resource
+def get_quote_service():
+    return QuoteService(get_order_store())
+
+# Greeks and delta/vega ladders over the order book, updated incrementally across reruns
+@st.cache_resource
+def get_risk_book():
+    return RiskBook(get_order_store(), get_market_data())
+
+# Backtest results are cached per structure and history source so reruns don't recompute them
+@st.cache_data(show_spinner="Running backtest...")
+def run_backtest(source, pairs, name, relative_strikes, tenor, cost):
+    summary, results = backtest_pairs(source, pairs, name, relative_strikes, tenor, cost)
+    return summary, {pair: result.payouts for pair, result in results.items()}
+
+# Function to append new orders to the journal
+def save_orders(new_rows):
+    order_ids = get_journal().append(new_rows)
+    get_order_store().invalidate()
+    return order_ids
+
+# Function to soft-delete orders from the journal
+def remove_orders(order_ids):
+    removed = get_journal().remove(order_ids)
+    get_order_store().invalidate()
+    return removed
+
+# Function to load the live orders (an indexed view of the cached order book)
+def load_orders():
+    return get_order_store().refresh()
 
 # Set title
 st.set_page_config(page_title="Trade Idea Generator", page_icon=":chart_with_upwards_trend:", layout="wide")
 st.title('Trade Idea Generator')
 
+# Opt-in per-section timing of this rerun (FX_APP_PROFILE=1 or ?debug=1); memory only with FX_APP_PROFILE=1
+query_params = st.query_params if hasattr(st, 'query_params') else st.experimental_get_query_params()
+profiler = RerunProfiler(enabled=profiling_requested(query_params), log_path="metrics.log",
+                         trace_memory=memory_tracing_requested())
+
+# Load orders from the journal when the app starts
+order_data = load_orders()
+
+# Pick up any new market-data drops
+market_data = get_market_data()
+market_data.refresh()
+if market_data.rejected:
+    st.warning(f"Skipped {len(market_data.rejected)} unreadable market-data drop(s): "
+               + "; ".join(f"{name}: {error}" for name, error in sorted(market_data.rejected.items())))
+profiler.checkpoint("Load orders & market data")
+
 # Create columns for input widgets
 col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -31,37 +105,63 @@ with col3:
     action = st.selectbox('Action', ['Buy', 'Sell'])
 
 # Validate option type
-option_type = st.selectbox('Option Type', ['call spread', 'put spread', 'call spread RKI', 'put spread RKI', 'digital', 'call ERKO', 'put ERKO', 'digi risk reversal'])
-
-# Number of strike inputs based on option type
-num_strikes = {"call spread": 2, "put spread": 2, "call spread RKI": 3, "put spread RKI": 3, "digital": 1, "call ERKO": 2, "put ERKO": 2, 'digi risk reversal': 3}.get(option_type, 0)
+option_type = st.selectbox('Option Type', list(STRUCTURES))
+structure_spec = STRUCTURES[option_type]
 
 # Create a new row of columns for strikes
 col_strike1, col_strike2, col_strike3 = st.columns([1, 1, 1])
 strikes = []
-for i in range(num_strikes):
-    label = f'ERKO' if (option_type in ['call ERKO', 'put ERKO', 'digi risk reversal'] and i == 1) else f'RKI' if (option_type in ['call spread RKI', 'put spread RKI', 'digi risk reversal'] and i >= 2) else f'Strike {i + 1}'
-    with eval(f'col_strike{i + 1}'):
+for i, label in enumerate(structure_spec.strike_labels):
+    with [col_strike1, col_strike2, col_strike3][i]:
         strikes.append(st.number_input(label, format='%f'))
 
-# Conditional input for Cost with unit based on option type
-if option_type == 'digital':
-    cost = st.number_input('Cost (%)', min_value=0.0, format='%f')
-    cost_unit = '%'
-    leverage = round(1 / (cost / 100), 1) if cost != 0 else 0
-else:
-    cost = st.number_input('Cost (bps)', min_value=0.0, format='%f')
-    cost_unit = 'bps'
-    if option_type in ['call spread', 'put spread']:
-        leverage = round((abs(strikes[1] - strikes[0]) / strikes[0]) / (cost / 10000), 1) if cost != 0 else 0
-    elif option_type in ['call spread RKI', 'put spread RKI', 'digi risk reversal']:
-        leverage = round((abs(strikes[2] - strikes[0]) / strikes[0]) / (cost / 10000), 1) if cost != 0 else 0
-    elif option_type in ['call ERKO', 'put ERKO']:
-        leverage = round((abs(strikes[1] - strikes[0]) / strikes[0]) / (cost / 10000), 1) if cost != 0 else 0
+# Market inputs used to price the structure, taken from the latest market-data snapshot when there is one
+latest_snapshot = market_data.latest(currency_pair)
+use_market_data = latest_snapshot is not None and st.checkbox('Use Market Data', value=True)
+market_spot, market_forward_points, market_vol = 0.0, 0.0, 0.0
+if use_market_data:
+    try:
+        market_spot, market_forward, market_vol, _ = market_for_tenor(latest_snapshot, date)
+        market_forward_points = (market_forward - market_spot) / pip_size(currency_pair)
+        market_vol *= 100
+        st.caption(f"Market data as of {pd.Timestamp(latest_snapshot.timestamp, tz='UTC'):%Y-%m-%d %H:%M} UTC")
+    except ValueError:
+        use_market_data = False
+
+col_market1, col_market2, col_market3 = st.columns([1, 1, 1])
+with col_market1:
+    spot = st.number_input('Spot', min_value=0.0, value=float(market_spot), format='%f', disabled=use_market_data)
+with col_market2:
+    forward_points = st.number_input('Forward Points', value=float(market_forward_points), format='%f',
+                                     disabled=use_market_data)
+with col_market3:
+    vol = st.number_input('Vol (%)', min_value=0.0, value=float(market_vol), format='%f', disabled=use_market_data)
+
+# Model cost and delta pre-fill the inputs below once spot, vol and strikes are set
+market_snapshot = None
+model_cost, model_delta = 0.0, 0.0
+if spot > 0 and vol > 0:
+    if use_market_data:
+        market_snapshot = latest_snapshot
+    else:
+        market_snapshot = MarketSnapshot(currency_pair, None, spot, (date,), (forward_points,), (vol / 100,))
+    try:
+        if all(strike > 0 for strike in strikes):
+            priced = price_grid(market_snapshot, date, option_type, [strikes])
+            model_cost, model_delta = float(priced['cost'][0]), float(priced['delta'][0])
+            st.caption(f"Model: {model_cost:.1f} {structure_spec.cost_unit} / Delta {model_delta:.1f}%")
+    except ValueError as error:
+        market_snapshot = None
+        st.warning(str(error))
+
+# Cost input with unit based on option type; leverage comes from the structure engine
+cost_unit = structure_spec.cost_unit
+cost = st.number_input(f'Cost ({cost_unit})', min_value=0.0, value=max(round(model_cost, 1), 0.0), format='%f')
+leverage = round(float(evaluate(option_type, [strikes], [cost])['leverage'][0]), 1)
 
 # Conditional input for Net Delta
 if option_type != 'digital':
-    net_delta = st.number_input('Net Delta (%)', min_value=0.0, format='%f')
+    net_delta = st.number_input('Net Delta (%)', min_value=0.0, value=round(abs(model_delta), 1), format='%f')
 else:
     net_delta = None
 
@@ -86,34 +186,252 @@ if st.button('Generate Trade Idea'):
     """
     st.markdown(trade_idea_html, unsafe_allow_html=True)
 
+# Backtest the idea by rolling it over historical spot paths, with strikes relative to the current spot
+with st.expander("Backtest"):
+    backtest_col1, backtest_col2 = st.columns([1, 2])
+    with backtest_col1:
+        history_source = st.text_input("History Source", value="data/market",
+                                       help="Market-data root, or a directory of <PAIR>.csv files with date,spot columns")
+    with backtest_col2:
+        backtest_pair_list = st.multiselect("Pairs", CURRENCY_PAIRS,
+                                            default=[currency_pair] if currency_pair in CURRENCY_PAIRS else [])
+    if spot <= 0 or not all(strike > 0 for strike in strikes):
+        st.info("Enter spot and strikes to backtest them relative to spot.")
+    elif st.button("Run Backtest") and backtest_pair_list:
+        relative_strikes = tuple(strike / spot for strike in strikes)
+        st.caption(f"Strikes relative to spot: {' / '.join(f'{strike:.2%}' for strike in relative_strikes)}")
+        try:
+            backtest_summary, backtest_payouts = run_backtest(history_source, tuple(backtest_pair_list), option_type,
+                                                              relative_strikes, date, cost)
+        except ValueError as error:
+            st.warning(str(error))
+        else:
+            st.dataframe(backtest_summary, use_container_width=True)
+            for pair, payouts in backtest_payouts.items():
+                if len(payouts):
+                    counts, edges = np.histogram(payouts * 100, bins=20)
+                    st.caption(f"{pair} payout distribution (% of notional)")
+                    st.bar_chart(pd.Series(counts, index=[f"{edge:.2f}" for edge in edges[:-1]]))
+
+profiler.checkpoint("Trade idea generator")
+
+# Batch ideas: evaluate and rank many candidate structures in one vectorized pass
+with st.expander("Batch Ideas"):
+    batch_mode = st.radio("Ideas", ['Enter or Upload', 'Generate Grid'], horizontal=True, key='batch_mode')
+    if batch_mode == 'Enter or Upload':
+        st.caption(f"One idea per row: CCY Pair, Structure ({', '.join(STRUCTURES)}), "
+                   f"{', '.join(STRIKE_COLUMNS)} in the structure's strike order, and Cost in its cost unit.")
+        uploaded_ideas = st.file_uploader("Upload Ideas (CSV)", type='csv')
+        if uploaded_ideas is not None:
+            candidate_ideas = pd.read_csv(uploaded_ideas)
+        else:
+            candidate_ideas = pd.DataFrame([{'CCY Pair': currency_pair, 'Structure': option_type,
+                                             **dict(zip(STRIKE_COLUMNS, strikes)), 'Cost': cost}],
+                                           columns=IDEA_COLUMNS)
+        missing_columns = [column for column in ('Structure', 'Strike 1', 'Cost') if column not in candidate_ideas]
+        if missing_columns:
+            st.warning(f"Ideas are missing the {', '.join(missing_columns)} column(s); expected {', '.join(IDEA_COLUMNS)}.")
+        candidate_ideas = normalize_ideas(candidate_ideas)
+        candidate_ideas = st.data_editor(candidate_ideas, num_rows='dynamic', use_container_width=True,
+                                         key='batch_ideas')
+        price_batch = st.checkbox(f"Price {currency_pair} Costs from Market Inputs", disabled=market_snapshot is None)
+        if st.button('Rank Ideas') and not candidate_ideas.empty:
+            if price_batch and market_snapshot is not None:
+                candidate_ideas = price_ideas(candidate_ideas, market_snapshot, date)
+            unknown = candidate_ideas.loc[~candidate_ideas['Structure'].isin(list(STRUCTURES)), 'Structure']
+            if len(unknown):
+                st.warning(f"{len(unknown)} ideas have an unknown structure: {', '.join(map(str, unknown.unique()[:5]))}")
+            st.dataframe(evaluate_ideas(candidate_ideas), use_container_width=True)
+    else:
+        # Strikes as % of each pair's latest spot, priced off its latest market snapshot
+        grid_col1, grid_col2 = st.columns([2, 1])
+        with grid_col1:
+            priced_pairs = [pair for pair in CURRENCY_PAIRS if market_data.latest(pair) is not None]
+            grid_pairs = st.multiselect("Pairs", priced_pairs,
+                                        default=[currency_pair] if currency_pair in priced_pairs else [],
+                                        help="Pairs with market data")
+        with grid_col2:
+            grid_structure = st.selectbox("Structure", list(STRUCTURES), index=list(STRUCTURES).index(option_type),
+                                          key='grid_structure')
+        strike_grids = []
+        for label in STRUCTURES[grid_structure].strike_labels:
+            range_col1, range_col2, range_col3 = st.columns([1, 1, 1])
+            with range_col1:
+                grid_from = st.number_input(f"{label} From (% of spot)", value=95.0, key=f'grid_from_{label}')
+            with range_col2:
+                grid_to = st.number_input(f"{label} To (% of spot)", value=105.0, key=f'grid_to_{label}')
+            with range_col3:
+                grid_step = st.number_input(f"{label} Step (%)", min_value=0.01, value=1.0, key=f'grid_step_{label}')
+            strike_grids.append(np.arange(grid_from, grid_to + grid_step / 2, grid_step) / 100)
+        min_grid_cost = st.number_input(f"Min Cost ({STRUCTURES[grid_structure].cost_unit})", min_value=0.0,
+                                        value=1.0, help="Ideas priced below this are left out of the ranking")
+        grid_size = len(grid_pairs) * int(np.prod([len(grid) for grid in strike_grids]))
+        if grid_size > MAX_GRID_IDEAS:
+            st.warning(f"The grid has {grid_size:,} ideas; narrow it to at most {MAX_GRID_IDEAS:,}.")
+        elif st.button('Generate & Rank Ideas') and grid_pairs:
+            spots = {pair: market_data.latest(pair).spot for pair in grid_pairs}
+            grid_ideas = generate_ideas(spots, grid_structure, strike_grids)
+            try:
+                for pair in grid_pairs:
+                    grid_ideas = price_ideas(grid_ideas, market_data.latest(pair), date)
+            except ValueError as error:
+                st.warning(str(error))
+            else:
+                ranked_ideas = evaluate_ideas(grid_ideas[grid_ideas['Cost'] >= min_grid_cost])
+                st.caption(f"{len(grid_ideas):,} ideas generated, {len(ranked_ideas):,} ranked; "
+                           f"showing the top {min(len(ranked_ideas), GRID_IDEAS_SHOWN)}")
+                st.dataframe(ranked_ideas.head(GRID_IDEAS_SHOWN), use_container_width=True)
+
+profiler.checkpoint("Batch ideas")
 
 # Sidebar for data entry
 st.sidebar.header("FX Derivative Order Tracker")
 client_name = st.sidebar.text_input("Client Name")
-ccy_pair = st.sidebar.selectbox("Currency Pair", ["USDJPY", "EURUSD", "GBPUSD", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD", "EURGBP", "EURJPY", "GBPJPY", "AUDJPY", "AUDNZD", "EURAUD", "CHFJPY", "USDSEK", "USDNOK", "USDMXN", "USDCNH", "USDTWD", "USDKRW", "USDSGD", "USDZAR", "USDTRY", "USDINR"])
+ccy_pair = st.sidebar.selectbox("Currency Pair", CURRENCY_PAIRS)
 structure = st.sidebar.text_input("Structure")
 liquidity_provider = st.sidebar.text_input("Liquidity Provider")
 level = st.sidebar.number_input("Level Working with LP", min_value=0)
 client_fill_level = st.sidebar.number_input("Client Fill Level", min_value=0)
+if market_data.latest(ccy_pair) is not None:
+    st.sidebar.caption(f"{ccy_pair} spot {market_data.latest(ccy_pair).spot}")
+notional = st.sidebar.number_input("Notional", min_value=0)
 
 if st.sidebar.button("Add Order"):
     new_row = {'Client Name': client_name, 'CCY Pair': ccy_pair, 'Structure': structure,
-               'Liquidity Provider': liquidity_provider, 'Level': level, 'Client Fill Level': client_fill_level}
-    order_data = pd.concat([order_data, pd.DataFrame([new_row])], ignore_index=True)
+               'Liquidity Provider': liquidity_provider, 'Level': level, 'Client Fill Level': client_fill_level,
+               'Notional': notional}
+
+    # Append the order to the journal
+    save_orders([new_row])
+    order_data = load_orders()
     st.sidebar.success("Order Added!")
 
-    # Save orders to the CSV file
-    save_orders(order_data)
+profiler.checkpoint("Order entry")
 
-# Display the orders in a table
+# Display the orders one page at a time; filtering and sorting run against the order book indexes
 st.header("Current Orders")
-if not order_data.empty:
-    st.table(order_data)
+if len(order_data):
+    filter_col1, filter_col2, filter_col3, filter_col4 = st.columns([1, 1, 1, 1])
+    with filter_col1:
+        client_filter = st.multiselect("Client", order_data.values('Client Name'))
+    with filter_col2:
+        pair_filter = st.multiselect("CCY Pair", order_data.values('CCY Pair'))
+    with filter_col3:
+        lp_filter = st.multiselect("Liquidity Provider", order_data.values('Liquidity Provider'))
+    with filter_col4:
+        filter_levels = st.checkbox("Filter by Level")
+        level_range = None
+        if filter_levels:
+            level_range = (st.number_input("Level From", value=0.0, format='%f'),
+                           st.number_input("Level To", value=0.0, format='%f'))
+
+    sort_col1, sort_col2, sort_col3, sort_col4 = st.columns([1, 1, 1, 1])
+    with sort_col1:
+        sort_by = st.selectbox("Sort By", ['Order ID'] + list(order_data.columns))
+    with sort_col2:
+        ascending = st.selectbox("Order", ['Ascending', 'Descending']) == 'Ascending'
+    with sort_col3:
+        page_size = st.selectbox("Rows per Page", [25, 50, 100, 250], index=1)
+    with sort_col4:
+        page_number = st.number_input("Page", min_value=1, value=1, step=1)
 
-# Allow users to delete specific orders
+    order_page = query_orders(order_data,
+                              filters={'Client Name': client_filter, 'CCY Pair': pair_filter,
+                                       'Liquidity Provider': lp_filter},
+                              level_range=level_range, sort_by=sort_by, ascending=ascending,
+                              page=page_number, page_size=page_size)
+    st.dataframe(with_market(order_page.rows, market_data.latest), use_container_width=True)
+    st.caption(f"Page {order_page.page} of {order_page.pages} - {order_page.total} matching orders")
+
+    summary_col1, summary_col2 = st.columns([1, 1])
+    with summary_col1:
+        st.subheader("By CCY Pair")
+        st.dataframe(order_page.by_pair, use_container_width=True)
+    with summary_col2:
+        st.subheader("By Liquidity Provider")
+        st.dataframe(order_page.by_lp, use_container_width=True)
+
+profiler.checkpoint("Current orders")
+
+# Recent fills and near-level alerts from the quote service
+def show_quote_events(quote_service):
+    st.caption(f"{quote_service.ticks} ticks processed" + (" (streaming)" if quote_service.running else "")
+               + f", alerting within {quote_service.alert_pips:g} pips")
+    if quote_service.error is not None:
+        st.error(f"Quote feed stopped: {quote_service.error}")
+    events = pd.DataFrame(quote_service.recent_events(), columns=QuoteEvent._fields)
+    st.dataframe(events, use_container_width=True)
+
+# Refresh the events on a timer where this Streamlit version supports fragments
+if hasattr(st, 'fragment'):
+    show_quote_events = st.fragment(run_every=2)(show_quote_events)
+
+# Stream live quotes against the working levels
+with st.expander("Live Quotes"):
+    quote_service = get_quote_service()
+    feed_col1, feed_col2, feed_col3 = st.columns([2, 1, 1])
+    with feed_col1:
+        tick_source_spec = st.text_input("Tick Source", value="data/ticks.csv",
+                                         help="CSV of timestamp,pair,bid,ask to replay, or host:port of a TCP tick feed")
+    with feed_col2:
+        # The service is shared by all sessions: the distance is applied when the feed starts
+        alert_pips = st.number_input("Alert Distance (pips)", min_value=0.0, value=float(quote_service.alert_pips),
+                                     disabled=quote_service.running,
+                                     help="Applies to every session; set when the feed is started")
+    with feed_col3:
+        if quote_service.running:
+            if st.button("Stop Quotes"):
+                quote_service.stop()
+        elif st.button("Start Quotes"):
+            quote_service.start(tick_source(tick_source_spec), alert_pips=alert_pips)
+    show_quote_events(quote_service)
+
+profiler.checkpoint("Live quotes")
+
+# Aggregate exposure of the book by pair, LP and client; the first reprice prices the whole
+# book, so it only runs once someone asks for risk
+with st.expander("Risk"):
+    if st.checkbox("Show Risk Ladders", key='show_risk'):
+        risk_book = get_risk_book()
+        if st.button("Full Reprice"):
+            risk_book.reprice()
+        else:
+            risk_book.update()
+        unpriced = risk_book.unpriced
+        st.caption("Delta in base-currency notional, vega in quote currency per vol point. "
+                   f"{unpriced} orders could not be priced (unparsed structure or no market data).")
+        for tab, (ladder_name, ladder) in zip(st.tabs(list(risk_book.ladders)), risk_book.ladders.items()):
+            with tab:
+                st.dataframe(ladder, use_container_width=True)
+
+profiler.checkpoint("Risk")
+
+# Allow users to delete specific orders, picked from the in-memory book rather than the journal
 st.subheader("Remove Specific Orders")
-order_to_remove = st.selectbox("Select an Order to Remove", order_data['Client Name'].unique(), key='remove_order')
-if st.button("Remove Selected Order"):
-    order_data = order_data[order_data['Client Name'] != order_to_remove]
-    save_orders(order_data)
-    st.success(f"Order for {order_to_remove} Removed!")
+order_index = load_orders()
+client_to_remove = st.selectbox("Select a Client", order_index.values('Client Name'), key='remove_client')
+client_positions = order_index.positions('Client Name', [client_to_remove] if client_to_remove is not None else [])
+remove_pair = st.selectbox("Select a Pair", ['All'] + order_index.values('CCY Pair'), key='remove_pair')
+if remove_pair != 'All':
+    client_positions = np.intersect1d(client_positions, order_index.positions('CCY Pair', [remove_pair]),
+                                      assume_unique=True)
+# Newest orders first, capped so the picker stays small for clients with thousands of orders
+client_orders = order_index.take(client_positions[::-1][:REMOVE_PICKER_LIMIT])
+if len(client_positions) > REMOVE_PICKER_LIMIT:
+    st.caption(f"Showing the latest {REMOVE_PICKER_LIMIT} of {len(client_positions)} orders; "
+               "pick a pair to narrow them down.")
+order_to_remove = st.selectbox("Select an Order to Remove", client_orders.index,
+                               format_func=lambda order_id: f"#{order_id} {client_orders.at[order_id, 'CCY Pair']} "
+                                                            f"{client_orders.at[order_id, 'Structure']}",
+                               key='remove_order')
+if st.button("Remove Selected Order") and order_to_remove is not None:
+    remove_orders([order_to_remove])
+    order_data = load_orders()
+    st.success(f"Order #{order_to_remove} for {client_to_remove} Removed!")
+
+# Debug panel with this rerun's profile, also appended to metrics.log
+if profiler.enabled:
+    profile_sections = profiler.finish("Remove orders")
+    with st.sidebar.expander("Rerun Profile", expanded=True):
+        st.caption(f"Rerun took {profiler.total_ms:.1f} ms")
+        st.dataframe(pd.DataFrame(profile_sections).set_index('section').round(1), use_container_width=True)
@@ -0,0 +1,113 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from market_data import MarketDataStore
+from pricing import tenor_to_years
+from structures import COST_SCALE, STRUCTURES, evaluate, knocked_in, payoff
+
+# Trading days per year used to turn a tenor into daily observations
+TRADING_DAYS = 252
+
+_NS_PER_DAY = 86400 * 10 ** 9
+
+# Backtest of one structure on one pair: a start date and payout (fraction of notional) per roll
+BacktestResult = namedtuple('BacktestResult', ['pair', 'start_dates', 'payouts', 'summary'])
+
+
+# Daily spot history for a pair as (dates, spots).
+# `source` is a market-data root (its snapshots are reduced to the last one per day)
+# or a directory of <PAIR>.csv files with date and spot columns. Nothing is written to it.
+def load_spot_history(source, pair):
+    if os.path.isdir(os.path.join(source, 'history')):
+        stamps, spots = MarketDataStore(source, read_only=True).spot_history(pair)
+        days = np.asarray(stamps) // _NS_PER_DAY
+        last = np.append(days[1:] != days[:-1], True) if len(days) else np.empty(0, dtype=bool)
+        return pd.to_datetime(days[last] * _NS_PER_DAY, utc=True), np.asarray(spots)[last]
+    path = os.path.join(source, f"{pair}.csv")
+    if not os.path.exists(path):
+        return pd.DatetimeIndex([], tz='UTC'), np.empty(0)
+    history = pd.read_csv(path, parse_dates=['date']).sort_values('date')
+    return pd.DatetimeIndex(history['date']), history['spot'].to_numpy(dtype='float64')
+
+
+# Roll a structure over every start date of a spot history in one vectorized pass.
+#   relative_strikes: strikes as multiples of spot at each start (e.g. [1.0, 1.033, 0.967])
+#   cost:             quoted cost in the structure's cost unit
+def backtest_structure(name, dates, spots, relative_strikes, tenor, cost, pair=''):
+    structure = STRUCTURES[name]
+    steps = max(1, int(round(tenor_to_years(tenor) * TRADING_DAYS)))
+    relative_strikes = np.asarray(relative_strikes, dtype='float64')
+    if len(spots) <= steps:
+        summary = _summarize(structure, np.empty(0), None, None, cost, relative_strikes)
+        return BacktestResult(pair, dates[:0], np.empty(0), summary)
+    # One row per start date, each a view onto the same spot array
+    paths = sliding_window_view(np.asarray(spots, dtype='float64'), steps + 1)
+    spot0 = paths[:, 0]
+    strikes = relative_strikes[None, :] * spot0[:, None]
+    payouts = payoff(name, paths, strikes)
+    if structure.cost_unit != '%':
+        payouts = payouts / spot0
+
+    rki_hits = erko_breaches = None
+    labels = structure.strike_labels
+    if 'RKI' in labels:
+        barrier = strikes[:, labels.index('RKI')]
+        rki_hits = knocked_in(spot0, paths.min(axis=1), paths.max(axis=1), barrier)
+    if 'ERKO' in labels:
+        barrier = strikes[:, labels.index('ERKO')]
+        final = paths[:, -1]
+        erko_breaches = np.where(barrier > strikes[:, 0], final >= barrier, final <= barrier)
+    summary = _summarize(structure, payouts, rki_hits, erko_breaches, cost, relative_strikes)
+    return BacktestResult(pair, dates[:len(payouts)], payouts, summary)
+
+
+# Quoted Leverage follows the desk's quoting convention (for RKIs, the barrier distance over
+# cost); Max Leverage is the structure's true max payout over cost, the figure Max Realized
+# Leverage can at most reach
+def _summarize(structure, payouts, rki_hits, erko_breaches, cost, relative_strikes):
+    cost_fraction = cost / COST_SCALE[structure.cost_unit]
+    evaluated = evaluate(structure.name, [relative_strikes], [cost])
+    max_leverage = float(evaluated['max_payout'][0]) / cost_fraction if cost_fraction else 0.0
+    summary = {'Starts': len(payouts), 'Quoted Leverage': float(evaluated['leverage'][0]),
+               'Max Leverage': max_leverage}
+    if not len(payouts):
+        return summary
+    percentiles = np.percentile(payouts, [5, 25, 50, 75, 95]) * 100
+    summary.update({
+        'Mean Payout (%)': payouts.mean() * 100,
+        'P5 (%)': percentiles[0], 'P25 (%)': percentiles[1], 'Median (%)': percentiles[2],
+        'P75 (%)': percentiles[3], 'P95 (%)': percentiles[4],
+        'Hit Rate (%)': (payouts > 0).mean() * 100,
+        'Mean P&L (%)': (payouts.mean() - cost_fraction) * 100,
+        'Realized Leverage': payouts.mean() / cost_fraction if cost_fraction else 0.0,
+        'Max Realized Leverage': payouts.max() / cost_fraction if cost_fraction else 0.0,
+    })
+    if rki_hits is not None:
+        summary['RKI Hit Rate (%)'] = rki_hits.mean() * 100
+    if erko_breaches is not None:
+        summary['ERKO Breach Rate (%)'] = erko_breaches.mean() * 100
+    return summary
+
+
+def _backtest_pair(arguments):
+    source, pair, name, relative_strikes, tenor, cost = arguments
+    dates, spots = load_spot_history(source, pair)
+    return backtest_structure(name, dates, spots, relative_strikes, tenor, cost, pair)
+
+
+# Backtest one structure on several pairs, one process per pair; returns a summary frame
+# indexed by pair and the per-pair BacktestResults
+def backtest_pairs(source, pairs, name, relative_strikes, tenor, cost, processes=None):
+    tasks = [(source, pair, name, list(relative_strikes), tenor, cost) for pair in pairs]
+    if processes == 1 or len(tasks) <= 1:
+        results = [_backtest_pair(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_backtest_pair, tasks))
+    summary = pd.DataFrame([result.summary for result in results], index=pd.Index(pairs, name='CCY Pair'))
+    return summary, {result.pair: result for result in results}
@@ -0,0 +1,177 @@
+# Benchmarks for the paths a Streamlit rerun of app.py exercises, over synthetic order books.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_app                      # compare against baselines.json
+#     python -m benchmarks.bench_app --update-baselines   # record new baselines
+#     python -m benchmarks.bench_app --sizes 1000 10000   # smaller books only
+#
+# Each path is timed as the best of a few repeats. A path regresses when it is slower
+# than its baseline by more than --tolerance (relative) and 1 ms (absolute); the script
+# then exits with status 1. Paths in INFO_PATHS (the legacy CSV round trip the app no
+# longer runs) are reported for comparison only and never fail the run.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import MarketDataStore
+from order_journal import OrderJournal
+from order_store import OrderStore
+from order_view import query_orders, with_market
+from pricing import MarketSnapshot
+from risk import RiskBook
+from structures import STRUCTURES, evaluate
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Paths timed once for information, outside the regression gate
+INFO_PATHS = {'csv_save_orders', 'csv_load_orders'}
+
+CLIENTS = [f"Client {i}" for i in range(200)]
+PAIRS = ["USDJPY", "EURUSD", "GBPUSD", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD", "EURGBP", "EURJPY", "GBPJPY", "AUDJPY",
+         "AUDNZD", "EURAUD", "CHFJPY", "USDSEK", "USDNOK", "USDMXN", "USDCNH", "USDTWD", "USDKRW", "USDSGD", "USDZAR",
+         "USDTRY", "USDINR"]
+PROVIDERS = ["GS", "JPM", "CITI", "BARC", "UBS", "DB", "MS", "HSBC"]
+
+
+# Synthetic order book with the app's columns
+def synthetic_orders(size, seed=0):
+    rng = np.random.default_rng(seed)
+    names = list(STRUCTURES)
+    return pd.DataFrame({
+        'Client Name': np.array(CLIENTS)[rng.integers(len(CLIENTS), size=size)],
+        'CCY Pair': np.array(PAIRS)[rng.integers(len(PAIRS), size=size)],
+        'Structure': [f"Buy 1m 150/155 {names[i]}" for i in rng.integers(len(names), size=size)],
+        'Liquidity Provider': np.array(PROVIDERS)[rng.integers(len(PROVIDERS), size=size)],
+        'Level': rng.uniform(100, 200, size=size).round(2),
+        'Client Fill Level': rng.uniform(100, 200, size=size).round(2),
+        'Notional': rng.integers(1, 50, size=size) * 1e6,
+    })
+
+
+# Best wall time of `repeat` calls of fn, in seconds. With `setup`, each call is
+# fn(setup()) and only fn is timed.
+def best_of(fn, repeat=5, setup=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is None:
+            start = time.perf_counter()
+            fn()
+        else:
+            argument = setup()
+            start = time.perf_counter()
+            fn(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Market-data store with one snapshot per benchmark pair, spot matching the synthetic strikes
+def synthetic_market(directory):
+    rows = [{'timestamp': '2024-01-02', 'pair': pair, 'tenor': tenor, 'spot': 152.0, 'forward_points': -50.0,
+             'vol': 10.0} for pair in PAIRS for tenor in ('1w', '1m', '3m')]
+    market_data = MarketDataStore(os.path.join(directory, "market"))
+    pd.DataFrame(rows).to_csv(os.path.join(market_data.incoming, "snapshot.csv"), index=False)
+    market_data.ingest()
+    return market_data
+
+
+def bench_size(size, directory, market_data):
+    orders = synthetic_orders(size)
+    results = {}
+
+    # Legacy CSV round trip that app.py used to do on every rerun and every click
+    csv_path = os.path.join(directory, f"orders_{size}.csv")
+    results['csv_save_orders'] = best_of(lambda: orders.to_csv(csv_path, index=False), repeat=1)
+    results['csv_load_orders'] = best_of(lambda: pd.read_csv(csv_path), repeat=1)
+
+    journal = OrderJournal(os.path.join(directory, f"orders_{size}.db"))
+    journal.append(orders.to_dict('records'))
+    store = OrderStore(journal, poll_interval=0)
+    results['load_orders_cold'] = best_of(lambda: OrderStore(journal).refresh(), repeat=3)
+    store.refresh()
+    results['load_orders_rerun'] = best_of(store.refresh)
+
+    row = orders.iloc[0].to_dict()
+    results['save_orders_add_one'] = best_of(lambda: journal.append([row]))
+    results['remove_order_one'] = best_of(lambda order_ids: journal.remove(order_ids),
+                                          setup=lambda: journal.append([row]))
+    results['load_orders_after_write'] = best_of(lambda _: store.refresh(), setup=lambda: journal.append([row]))
+
+    # Journal lookups, and the in-memory remove-order picker app.py serves instead
+    client = CLIENTS[0]
+    results['journal_clients'] = best_of(journal.clients)
+    results['journal_find_client'] = best_of(lambda: journal.find(client=client))
+    store.refresh()
+    results['remove_picker'] = best_of(lambda: store.refresh().take(
+        store.refresh().positions('Client Name', [store.refresh().values('Client Name')[0]])[::-1][:200]))
+
+    # Risk ladders: an update() with nothing changed, and one after a single new order
+    risk_book = RiskBook(store, market_data)
+    results['risk_update_noop'] = best_of(risk_book.update)
+    results['risk_update_add_one'] = best_of(lambda _: risk_book.update(), setup=lambda: journal.append([row]))
+
+    ideas = np.column_stack([orders['Level'], orders['Level'] * 1.03])
+    costs = np.full(size, 50.0)
+    results['leverage'] = best_of(lambda: evaluate('call spread', ideas, costs))
+
+    index = store.refresh()
+    snapshot = MarketSnapshot('USDJPY', None, 150.0, ('1m',), (0.0,), (0.1,))
+    latest = lambda pair: snapshot
+    results['render_prep_first_page'] = best_of(lambda: with_market(query_orders(index).rows, latest))
+    results['render_prep_filtered_sorted'] = best_of(lambda: with_market(query_orders(
+        index, filters={'CCY Pair': ['USDJPY', 'EURUSD']}, level_range=(120, 180), sort_by='Client Name',
+        page=5).rows, latest))
+    # First page right after a write: only the book's tail is indexed again
+    results['render_prep_after_write'] = best_of(lambda book: with_market(query_orders(book).rows, latest),
+                                                  setup=lambda: (journal.append([row]), store.refresh())[1])
+    results['render_prep_index_build'] = best_of(lambda: query_orders(type(index)(index.frame), sort_by='Level'),
+                                                 repeat=3)
+    journal.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app.py rerun paths over synthetic order books")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--update-baselines', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed relative slowdown (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(BASELINES) as handle:
+            baselines = json.load(handle)
+    except FileNotFoundError:
+        baselines = {}
+
+    regressions = []
+    with tempfile.TemporaryDirectory() as directory:
+        market_data = synthetic_market(directory)
+        for size in args.sizes:
+            results = bench_size(size, directory, market_data)
+            for path, seconds in results.items():
+                baseline = baselines.get(str(size), {}).get(path)
+                flag = ''
+                if path in INFO_PATHS:
+                    flag = '  (info)'
+                elif baseline is not None and seconds > baseline * (1 + args.tolerance) and seconds - baseline > 1e-3:
+                    flag = f'  REGRESSION (baseline {baseline * 1000:.2f} ms)'
+                    regressions.append((size, path))
+                print(f"{size:>9,} {path:<30} {seconds * 1000:10.2f} ms{flag}")
+            if args.update_baselines:
+                baselines[str(size)] = {path: round(seconds, 6) for path, seconds in results.items()}
+
+    if args.update_baselines:
+        with open(BASELINES, 'w') as handle:
+            json.dump(baselines, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+
+# Environment variable that switches rerun profiling, including memory tracing, on for every session
+PROFILE_ENV = "FX_APP_PROFILE"
+
+# tracemalloc is process-wide: it runs while any profiler is tracing and is
+# stopped again by the last one to finish or be collected, unless something else started it
+_tracing_lock = threading.Lock()
+_tracers = 0
+_started_tracing = False
+
+
+# Opt-in timing and memory of one Streamlit rerun, section by section.
+#
+# Sections are delimited with checkpoint(name), which closes the section that
+# started at the previous checkpoint, so the app needs no re-indentation to be
+# instrumented. Each section records its wall time; with `trace_memory`,
+# tracemalloc also tracks Python allocations for the net allocation and peak of
+# each section (peaks are process-wide, so they are only recorded while no other
+# profiler is tracing). finish() closes the rerun, releases its hold on tracing
+# and appends the rerun as one JSON line to the metrics log. A rerun interrupted
+# before finish() releases tracing when its profiler is garbage collected. When
+# disabled every call is a no-op.
+class RerunProfiler:
+    def __init__(self, enabled=False, log_path="metrics.log", trace_memory=False):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.trace_memory = enabled and trace_memory
+        self.sections = []
+        self._finished = False
+        if not enabled:
+            return
+        if self.trace_memory:
+            _start_tracing()
+            self._release_tracing = weakref.finalize(self, _stop_tracing)
+            self._memory = tracemalloc.get_traced_memory()[0]
+            self._reset_peak()
+        self._section_started = time.perf_counter()
+
+    # Close the current section under `name` and start the next one
+    def checkpoint(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        section = {'section': name, 'ms': (now - self._section_started) * 1000}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            section['alloc_kb'] = (current - self._memory) / 1024
+            section['peak_kb'] = peak / 1024 if self._reset_peak() else None
+            self._memory = current
+        self.sections.append(section)
+        self._section_started = time.perf_counter()
+
+    # Reset the traced peak if this is the only profiler tracing; returns whether it was
+    @staticmethod
+    def _reset_peak():
+        with _tracing_lock:
+            if _tracers != 1:
+                return False
+            tracemalloc.reset_peak()
+            return True
+
+    # Total rerun time in ms, once enabled
+    @property
+    def total_ms(self):
+        return sum(section['ms'] for section in self.sections)
+
+    # Close the final section and append the rerun to the metrics log; returns the sections
+    def finish(self, name="Render"):
+        if not self.enabled:
+            return []
+        if self._finished:
+            return self.sections
+        self.checkpoint(name)
+        self._finished = True
+        if self.trace_memory:
+            self._release_tracing()
+        record = {'timestamp': time.time(), 'total_ms': self.total_ms, 'sections': self.sections}
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.log_path, 'a') as handle:
+            handle.write(json.dumps(record) + "\n")
+        return self.sections
+
+
+def _start_tracing():
+    global _tracers, _started_tracing
+    with _tracing_lock:
+        if _tracers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracers += 1
+
+
+def _stop_tracing():
+    global _tracers, _started_tracing
+    with _tracing_lock:
+        _tracers -= 1
+        if _tracers == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+# Whether memory tracing is switched on; only the environment can enable it, since
+# tracemalloc slows down every session in the process while it runs
+def memory_tracing_requested():
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+# Whether rerun timing is switched on by the environment or a '?debug=1' query parameter
+def profiling_requested(query_params):
+    if memory_tracing_requested():
+        return True
+    value = query_params.get("debug")
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return value in ("1", "true", "yes")
@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from pricing import MarketSnapshot
+
+# Tenor grid every snapshot is stored on; tenors missing from a drop are stored as NaN
+TENORS = ('1w', '2w', '1m', '2m', '3m', '6m', '9m', '1y')
+
+# Columns expected in a drop file, one row per (timestamp, pair, tenor); vol is in %
+DROP_COLUMNS = ['timestamp', 'pair', 'tenor', 'spot', 'forward_points', 'vol']
+
+_DTYPES = {'timestamp': 'int64', 'spot': 'float64', 'forward_points': 'float64', 'vols': 'float64'}
+# The timestamp column is written last: readers size the history from it
+_WRITE_ORDER = ['spot', 'forward_points', 'vols', 'timestamp']
+_WIDTH = {'timestamp': 1, 'spot': 1, 'forward_points': len(TENORS), 'vols': len(TENORS)}
+
+
+# Local market-data cache.
+#
+# CSV/Parquet drops land in <root>/incoming (a directory standing in for the feed).
+# ingest() folds each new file once into per-pair columnar history under
+# <root>/history/<PAIR>/ as raw arrays (timestamp, spot, forward_points,
+# vols), which are read back as read-only memory maps. Point-in-time lookups
+# binary-search the timestamp column and keep recently built snapshots in an LRU.
+# A drop that cannot be read is recorded in the manifest so it is not retried until it
+# changes, and its error is kept in `rejected` (file name -> message).
+# A `read_only` store only reads existing history: it creates no directories and
+# refresh()/ingest() do nothing.
+class MarketDataStore:
+    def __init__(self, root="data/market", poll_interval=5.0, cache_size=512, read_only=False):
+        self.root = root
+        self.incoming = os.path.join(root, "incoming")
+        self.history = os.path.join(root, "history")
+        self.poll_interval = poll_interval
+        self.cache_size = cache_size
+        self.read_only = read_only
+        self._manifest_path = os.path.join(self.history, "manifest.json")
+        self._maps = {}
+        self._snapshots = OrderedDict()
+        self.rejected = {}
+        self._polled_at = None
+        self._lock = threading.RLock()
+        if not read_only:
+            os.makedirs(self.incoming, exist_ok=True)
+            os.makedirs(self.history, exist_ok=True)
+
+    # Ingest new drops at most every `poll_interval` seconds; returns snapshots added
+    def refresh(self):
+        now = time.monotonic()
+        if self._polled_at is not None and now - self._polled_at < self.poll_interval:
+            return 0
+        self._polled_at = now
+        return self.ingest()
+
+    # Fold every drop file not seen before into the history; returns snapshots added
+    def ingest(self):
+        if self.read_only:
+            return 0
+        with self._lock:
+            manifest = self._load_manifest()
+            added, changed = 0, False
+            for entry in sorted(os.scandir(self.incoming), key=lambda entry: entry.name):
+                if not entry.is_file() or not entry.name.endswith(('.csv', '.parquet')):
+                    continue
+                stat = entry.stat()
+                signature = [stat.st_mtime_ns, stat.st_size]
+                if manifest.get(entry.name) == signature:
+                    continue
+                try:
+                    drop = _read_drop(entry.path)
+                except (OSError, ValueError) as error:
+                    self.rejected[entry.name] = str(error)
+                    manifest[entry.name] = signature
+                    changed = True
+                    continue
+                if drop is None:
+                    continue
+                self.rejected.pop(entry.name, None)
+                for pair, rows in drop.groupby('pair', sort=False):
+                    added += self._append(pair, rows)
+                manifest[entry.name] = signature
+                changed = True
+            if changed:
+                self._save_manifest(manifest)
+            return added
+
+    # Pairs with stored history
+    def pairs(self):
+        if not os.path.isdir(self.history):
+            return []
+        return sorted(name for name in os.listdir(self.history)
+                      if os.path.isdir(os.path.join(self.history, name)))
+
+    # Latest snapshot for a pair, or None without history
+    def latest(self, pair):
+        return self.as_of(pair, None)
+
+    # Last snapshot at or before `timestamp` (anything pandas.Timestamp accepts), or None
+    def as_of(self, pair, timestamp):
+        # Look up the row and build its snapshot under the lock so a concurrent ingest
+        # cannot renumber rows in between and leave a wrong snapshot in the LRU
+        with self._lock:
+            columns = self._columns(pair)
+            if columns is None:
+                return None
+            stamps = columns['timestamp']
+            if timestamp is None:
+                row = len(stamps) - 1
+            else:
+                row = int(np.searchsorted(stamps, _to_ns(timestamp), side='right')) - 1
+            if row < 0:
+                return None
+            return self._snapshot(pair, row, columns)
+
+    # Timestamps (ns since epoch) and spots for a pair as read-only memory maps
+    def spot_history(self, pair):
+        columns = self._columns(pair)
+        if columns is None:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+        return columns['timestamp'], columns['spot']
+
+    # Callers hold the lock
+    def _snapshot(self, pair, row, columns):
+        key = (pair, row)
+        if key in self._snapshots:
+            self._snapshots.move_to_end(key)
+            return self._snapshots[key]
+        quoted = ~np.isnan(columns['vols'][row])
+        snapshot = MarketSnapshot(pair, int(columns['timestamp'][row]), float(columns['spot'][row]),
+                                  tuple(tenor for tenor, is_quoted in zip(TENORS, quoted) if is_quoted),
+                                  tuple(float(value) for value in columns['forward_points'][row][quoted]),
+                                  tuple(float(value) for value in columns['vols'][row][quoted]))
+        self._snapshots[key] = snapshot
+        if len(self._snapshots) > self.cache_size:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    # Memory maps of a pair's columns, remapped only when the files have grown
+    def _columns(self, pair):
+        directory = os.path.join(self.history, pair)
+        path = os.path.join(directory, "timestamp.i8")
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            size = os.path.getsize(path)
+            cached = self._maps.get(pair)
+            if cached is not None and cached[0] == size:
+                return cached[1]
+            rows = size // 8
+            columns = {}
+            for name, dtype in _DTYPES.items():
+                shape = (rows,) if _WIDTH[name] == 1 else (rows, _WIDTH[name])
+                columns[name] = (np.memmap(os.path.join(directory, _filename(name)), dtype=dtype, mode='r',
+                                           shape=shape)
+                                 if rows else np.empty(shape, dtype=dtype))
+            self._maps[pair] = (size, columns)
+            return columns
+
+    # Append one pair's drop rows to its history, rewriting only if they arrive out of order
+    def _append(self, pair, rows):
+        snapshots = _pivot(rows)
+        if snapshots is None:
+            return 0
+        directory = os.path.join(self.history, pair)
+        os.makedirs(directory, exist_ok=True)
+        existing = self._columns(pair)
+        if existing is not None and len(existing['timestamp']) and \
+                snapshots['timestamp'][0] <= existing['timestamp'][-1]:
+            merged = {name: np.concatenate([np.asarray(existing[name]), snapshots[name]]) for name in _DTYPES}
+            order = np.argsort(merged['timestamp'], kind='stable')
+            merged = {name: values[order] for name, values in merged.items()}
+            # Keep the last write for duplicate timestamps
+            keep = np.append(merged['timestamp'][1:] != merged['timestamp'][:-1], True)
+            merged = {name: values[keep] for name, values in merged.items()}
+            self._maps.pop(pair, None)
+            # Replace rather than truncate the files so open memory maps keep reading the old data
+            for name in _WRITE_ORDER:
+                path = os.path.join(directory, _filename(name))
+                merged[name].astype(_DTYPES[name]).tofile(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            added = len(merged['timestamp']) - len(existing['timestamp'])
+        else:
+            for name in _WRITE_ORDER:
+                with open(os.path.join(directory, _filename(name)), 'ab') as handle:
+                    handle.write(np.ascontiguousarray(snapshots[name], dtype=_DTYPES[name]).tobytes())
+            added = len(snapshots['timestamp'])
+        # Row numbers may have shifted, so drop this pair's cached snapshots
+        self._snapshots = OrderedDict((key, value) for key, value in self._snapshots.items() if key[0] != pair)
+        return added
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self, manifest):
+        temporary = self._manifest_path + ".tmp"
+        with open(temporary, 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(temporary, self._manifest_path)
+
+
+def _filename(name):
+    return f"{name}.{'i8' if _DTYPES[name] == 'int64' else 'f8'}"
+
+
+def _to_ns(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+# Read a drop file into DROP_COLUMNS; Parquet needs pyarrow (or fastparquet) installed.
+# Raises ValueError for a malformed file.
+def _read_drop(path):
+    if path.endswith('.parquet'):
+        try:
+            drop = pd.read_parquet(path)
+        except ImportError:
+            return None
+    else:
+        drop = pd.read_csv(path)
+    missing = set(DROP_COLUMNS) - set(drop.columns)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+    drop = drop[DROP_COLUMNS].astype({'spot': 'float64', 'forward_points': 'float64', 'vol': 'float64'})
+    drop['timestamp'] = (pd.to_datetime(drop['timestamp'], utc=True) - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(1, 'ns')
+    return drop
+
+
+# Pivot long (timestamp, tenor) rows into sorted per-snapshot column arrays
+def _pivot(rows):
+    rows = rows[rows['tenor'].isin(TENORS)]
+    if rows.empty:
+        return None
+    stamps = np.sort(rows['timestamp'].unique())
+    row = np.searchsorted(stamps, rows['timestamp'].to_numpy())
+    column = pd.Index(TENORS).get_indexer(rows['tenor'])
+    forward_points = np.full((len(stamps), len(TENORS)), np.nan)
+    vols = np.full((len(stamps), len(TENORS)), np.nan)
+    forward_points[row, column] = rows['forward_points'].to_numpy(dtype='float64')
+    vols[row, column] = rows['vol'].to_numpy(dtype='float64') / 100
+    spot = rows.groupby('timestamp')['spot'].last().reindex(stamps).to_numpy(dtype='float64')
+    return {'timestamp': stamps.astype('int64'), 'spot': spot, 'forward_points': forward_points, 'vols': vols}
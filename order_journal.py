@@ -0,0 +1,258 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+# Order columns as shown in the app, mapped to their journal column names
+ORDER_COLUMNS = {
+    'Client Name': 'client_name',
+    'CCY Pair': 'ccy_pair',
+    'Structure': 'structure',
+    'Liquidity Provider': 'liquidity_provider',
+    'Level': 'level',
+    'Client Fill Level': 'client_fill_level',
+    'Notional': 'notional',
+}
+
+NUMERIC_COLUMNS = ['Level', 'Client Fill Level', 'Notional']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_name TEXT,
+    ccy_pair TEXT,
+    structure TEXT,
+    liquidity_provider TEXT,
+    level REAL,
+    client_fill_level REAL,
+    notional REAL,
+    created_seq INTEGER NOT NULL,
+    deleted_seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS orders_client ON orders (client_name) WHERE deleted_seq IS NULL;
+CREATE INDEX IF NOT EXISTS orders_pair ON orders (ccy_pair) WHERE deleted_seq IS NULL;
+CREATE INDEX IF NOT EXISTS orders_lp ON orders (liquidity_provider) WHERE deleted_seq IS NULL;
+CREATE INDEX IF NOT EXISTS orders_created_seq ON orders (created_seq);
+CREATE INDEX IF NOT EXISTS orders_deleted_seq ON orders (deleted_seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# Empty order frame with the app's column layout, indexed by order id
+def empty_orders():
+    frame = pd.DataFrame(columns=list(ORDER_COLUMNS))
+    frame = frame.astype({column: 'float64' for column in NUMERIC_COLUMNS})
+    frame.index = pd.Index([], dtype='int64', name='Order ID')
+    return frame
+
+
+# Append-only order journal backed by SQLite in WAL mode.
+#
+# Every add or remove is a single indexed write stamped with a new journal
+# sequence number, so its cost does not depend on the size of the book.
+# Removals are soft-deletes: the row keeps its data and gets a tombstone
+# (deleted_seq), which lets readers replay changes since a known sequence.
+# compact() purges old tombstones.
+class OrderJournal:
+    def __init__(self, path="orders.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    # Add columns introduced after a journal file was first created
+    def _migrate(self):
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(orders)")}
+        for column in ORDER_COLUMNS.values():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE orders ADD COLUMN {column} REAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Run fn(conn, seq) in a write transaction under a freshly allocated sequence number.
+    # BEGIN IMMEDIATE takes the write lock up front so concurrent desks queue instead of clobbering.
+    def _write(self, fn):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._meta(conn, 'seq', 0) + 1
+                result = fn(conn, seq)
+                self._set_meta(conn, 'seq', seq)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return result
+
+    @staticmethod
+    def _meta(conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return type(default)(row[0]) if default is not None else row[0]
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                     "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Current journal sequence number; bumps on every add/remove
+    @property
+    def seq(self):
+        with self._lock:
+            return self._meta(self._conn, 'seq', 0)
+
+    # Sequence number up to which tombstones have been purged by compact()
+    @property
+    def compacted_seq(self):
+        with self._lock:
+            return self._meta(self._conn, 'compacted_seq', 0)
+
+    # Append orders (dicts keyed by the app's column names) and return their new order ids
+    def append(self, rows):
+        columns = list(ORDER_COLUMNS.values())
+        sql = (f"INSERT INTO orders ({', '.join(columns)}, created_seq) "
+               f"VALUES ({', '.join('?' * (len(columns) + 1))})")
+
+        def insert(conn, seq):
+            ids = []
+            for row in rows:
+                values = [_clean(row.get(name)) for name in ORDER_COLUMNS]
+                ids.append(conn.execute(sql, values + [seq]).lastrowid)
+            return ids
+
+        return self._write(insert)
+
+    # Soft-delete orders by id; returns the number of orders tombstoned
+    def remove(self, order_ids):
+        order_ids = [int(order_id) for order_id in order_ids]
+        if not order_ids:
+            return 0
+
+        def tombstone(conn, seq):
+            placeholders = ', '.join('?' * len(order_ids))
+            cursor = conn.execute(f"UPDATE orders SET deleted_seq = ? "
+                                  f"WHERE order_id IN ({placeholders}) AND deleted_seq IS NULL",
+                                  [seq] + order_ids)
+            return cursor.rowcount
+
+        return self._write(tombstone)
+
+    # Indexed lookup of live orders by order id, client, pair and/or LP
+    def find(self, order_id=None, client=None, pair=None, liquidity_provider=None):
+        clauses, params = ["deleted_seq IS NULL"], []
+        for column, value in (('order_id', order_id), ('client_name', client),
+                              ('ccy_pair', pair), ('liquidity_provider', liquidity_provider)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._frame(f"WHERE {' AND '.join(clauses)}", params)
+
+    # Distinct client names with live orders. Pinned to the partial client index, which is already
+    # in client order and holds only live rows; this still scans the index, so reruns should read
+    # clients from the in-memory OrderStore instead.
+    def clients(self):
+        rows = self._read("SELECT DISTINCT client_name FROM orders INDEXED BY orders_client "
+                          "WHERE deleted_seq IS NULL ORDER BY client_name")
+        return [row[0] for row in rows]
+
+    # All live orders as a frame indexed by order id
+    def live_orders(self):
+        return self._frame("WHERE deleted_seq IS NULL")
+
+    # Orders added and removed after journal sequence `seq`, read from one consistent snapshot.
+    # Returns (added orders, removed order ids, current seq), or None when compact() has purged
+    # tombstones newer than `seq` and the caller has to reload the whole book.
+    def changes_since(self, seq):
+        columns = ', '.join(ORDER_COLUMNS.values())
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                if seq < self._meta(conn, 'compacted_seq', 0):
+                    return None
+                current = self._meta(conn, 'seq', 0)
+                # Without the hint SQLite walks the deleted_seq index over every live order
+                added = conn.execute(f"SELECT order_id, {columns} FROM orders INDEXED BY orders_created_seq "
+                                     f"WHERE created_seq > ? AND deleted_seq IS NULL ORDER BY order_id",
+                                     (seq,)).fetchall()
+                removed = conn.execute("SELECT order_id FROM orders WHERE deleted_seq > ? AND created_seq <= ?",
+                                       (seq, seq)).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return _to_frame(added), [row[0] for row in removed], current
+
+    def _frame(self, where, params=()):
+        columns = ', '.join(ORDER_COLUMNS.values())
+        return _to_frame(self._read(f"SELECT order_id, {columns} FROM orders {where} ORDER BY order_id", params))
+
+    # Physically drop tombstoned orders removed at or before `before_seq` (default: all of them)
+    def compact(self, before_seq=None):
+        def purge(conn, seq):
+            limit = seq if before_seq is None else min(before_seq, seq)
+            cursor = conn.execute("DELETE FROM orders WHERE deleted_seq IS NOT NULL AND deleted_seq <= ?", (limit,))
+            self._set_meta(conn, 'compacted_seq', limit)
+            return cursor.rowcount
+
+        removed = self._write(purge)
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    # One-time import of a legacy orders.csv; later calls are no-ops
+    def import_csv(self, csv_path="orders.csv"):
+        with self._lock:
+            if self._meta(self._conn, 'csv_imported') is not None:
+                return 0
+        try:
+            legacy = pd.read_csv(csv_path)
+        except FileNotFoundError:
+            legacy = empty_orders()
+        rows = legacy.to_dict('records')
+
+        def load(conn, seq):
+            # Re-check inside the write lock in case another session imported meanwhile
+            if self._meta(conn, 'csv_imported') is not None:
+                return 0
+            columns = list(ORDER_COLUMNS.values())
+            conn.executemany(f"INSERT INTO orders ({', '.join(columns)}, created_seq) "
+                             f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                             [[_clean(row.get(name)) for name in ORDER_COLUMNS] + [seq] for row in rows])
+            self._set_meta(conn, 'csv_imported', csv_path)
+            return len(rows)
+
+        return self._write(load)
+
+
+# Build an order frame indexed by order id from (order_id, *ORDER_COLUMNS) rows
+def _to_frame(rows):
+    if not rows:
+        return empty_orders()
+    frame = pd.DataFrame.from_records(rows, columns=['Order ID'] + list(ORDER_COLUMNS))
+    for column in NUMERIC_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    return frame.set_index('Order ID')
+
+
+# Convert pandas/numpy scalars (and NaN) into values sqlite3 can bind
+def _clean(value):
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from order_journal import empty_orders
+from order_view import OrderIndex, concat_orders
+
+# Columns held as pandas categoricals in the in-memory book
+CATEGORICAL_COLUMNS = ['Client Name', 'CCY Pair', 'Liquidity Provider']
+
+
+# Orders added and removed rows the book keeps outside its base before consolidating
+TAIL_LIMIT = 5_000
+
+# Book versions whose changes are kept for changes_since()
+CHANGE_LOG_SIZE = 1_000
+
+
+# In-memory order book kept in step with an OrderJournal.
+#
+# The book is loaded once and then only the orders added or removed since the
+# last seen journal sequence number are read back, so a Streamlit rerun without
+# writes costs a sequence check instead of a full reload. The journal is polled
+# at most every `poll_interval` seconds unless invalidate() has been called
+# after a write.
+#
+# Each version of the book is an OrderIndex over a shared base frame: added orders
+# go to a small tail frame and removed base rows are masked out, so applying a
+# change copies and re-indexes only the tail (O(changes + tail_limit), not O(N)).
+# Once the tail and the removed rows together pass `tail_limit`, the live book is
+# consolidated into a new base, whose indexes are rebuilt on first use.
+#
+# Every change bumps the book's `version`, and the orders it added and removed are
+# kept for the last CHANGE_LOG_SIZE versions so consumers such as the risk book can
+# catch up with changes_since() instead of diffing whole books.
+class OrderStore:
+    def __init__(self, journal, poll_interval=1.0, tail_limit=TAIL_LIMIT):
+        self.journal = journal
+        self.poll_interval = poll_interval
+        self.tail_limit = tail_limit
+        self.seq = None
+        self.book = OrderIndex(_categorize(empty_orders()))
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    # The current book as one frame (materialized on first use per version)
+    @property
+    def frame(self):
+        return self.book.frame
+
+    # Force the next refresh() to consult the journal (call after save/remove)
+    def invalidate(self):
+        self._stale = True
+
+    # Return the current book (an OrderIndex), applying any journal changes first
+    def refresh(self):
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at < self.poll_interval:
+            return self.book
+        with self._lock:
+            self._stale = False
+            self._checked_at = now
+            if self.seq is not None and self.journal.seq == self.seq:
+                return self.book
+            changes = self.journal.changes_since(self.seq) if self.seq is not None else None
+            if changes is None:
+                self._reload()
+            else:
+                self._apply(*changes)
+            return self.book
+
+    # Orders added and removed after book version `version`, as (added orders, removed
+    # order ids, current version); None when those changes are no longer kept (the book
+    # was reloaded or the log has moved on) and the caller has to start from the whole book.
+    # Does not consult the journal: call refresh() first.
+    def changes_since(self, version):
+        with self._lock:
+            current = self.book.version
+            entries = [entry for entry in self._changes if entry[0] > version]
+            if version != current and (not entries or entries[0][0] != version + 1):
+                return None
+            removed = [order_id for entry in entries for order_id in entry[2]]
+            added = concat_orders([self.book.base.frame.iloc[:0]] + [entry[1] for entry in entries])
+            return added.drop(index=removed, errors='ignore'), removed, current
+
+    def _reload(self):
+        seq = self.journal.seq
+        self.book = OrderIndex(_categorize(self.journal.live_orders()), version=self.book.version + 1)
+        self._changes.clear()
+        # Orders written between reading seq and the frame are re-applied idempotently next time
+        self.seq = seq
+
+    def _apply(self, added, removed, seq):
+        book = self.book
+        base_ids = book.base.frame.index
+        tail, dropped = book.tail.frame, book.removed
+        if removed:
+            found = base_ids.get_indexer(removed)
+            dropped = np.union1d(dropped, found[found >= 0])
+            tail = tail.drop(index=removed, errors='ignore')
+        if not added.empty:
+            known = added.index.isin(tail.index) | (base_ids.get_indexer(added.index) >= 0)
+            added = _categorize(added[~known])
+            tail = concat_orders([tail, added])
+        version = book.version + 1
+        book = OrderIndex(book.base, tail, dropped, version)
+        if len(tail) + len(dropped) > self.tail_limit:
+            book = OrderIndex(book.frame, version=version)
+        self._changes.append((version, added, removed))
+        self.book = book
+        self.seq = seq
+
+
+# Convert the categorical columns of an order frame
+def _categorize(frame):
+    return frame.astype({column: 'category' for column in CATEGORICAL_COLUMNS})
@@ -0,0 +1,323 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# One page of the Current Orders view plus aggregates over every matching order
+OrderPage = namedtuple('OrderPage', ['rows', 'total', 'page', 'pages', 'by_pair', 'by_lp'])
+
+# Columns the view can filter on by exact value
+FILTER_COLUMNS = ['Client Name', 'CCY Pair', 'Liquidity Provider']
+
+
+# Read-only view of one version of the order book, with the indexes queries use.
+#
+# The book is a consolidated base frame, the positions of base rows removed since
+# it was consolidated, and a small tail frame of orders added since. Row positions
+# number the base rows first and then the tail rows. The base's indexes (value ->
+# row positions for the filter columns, a sorted Level array, dense sort ranks per
+# column and the summary) are built lazily and shared by every version derived from
+# the same base; a version only indexes its tail and masks out removed base rows,
+# so a write costs O(tail + removed) instead of re-indexing the book. With the
+# indexes a query touches only the matching rows and the visible page. `frame`
+# materializes the live book on first use, for consumers that need all of it.
+# `version` numbers the book's versions (see OrderStore.changes_since).
+class OrderIndex:
+    # `base` is a frame, or the base of an earlier version to share its indexes
+    def __init__(self, base, tail=None, removed=None, version=0):
+        self.base = base if isinstance(base, _Segment) else _Segment(base)
+        self.tail = _Segment(tail if tail is not None else self.base.frame.iloc[:0])
+        self.removed = removed if removed is not None else np.empty(0, dtype=np.intp)
+        self.version = version
+        self._frame = None
+        self._summary = None
+        self._values = {}
+        self._tail_keys = {}
+
+    # Number of live orders
+    def __len__(self):
+        return len(self.base) - len(self.removed) + len(self.tail)
+
+    @property
+    def columns(self):
+        return self.base.frame.columns
+
+    # The live book as one frame, base rows first
+    @property
+    def frame(self):
+        if self._frame is None:
+            base = self.base.frame
+            if len(self.removed):
+                keep = np.ones(len(base), dtype=bool)
+                keep[self.removed] = False
+                base = base.iloc[keep]
+            self._frame = concat_orders([base, self.tail.frame])
+        return self._frame
+
+    # Rows at `positions`, in that order
+    def take(self, positions, columns=None):
+        positions = np.asarray(positions, dtype=np.intp)
+        in_base = positions < len(self.base)
+        parts = [self.base.frame.iloc[positions[in_base]], self.tail.frame.iloc[positions[~in_base] - len(self.base)]]
+        if columns is not None:
+            parts = [part[columns] for part in parts]
+        rows = concat_orders(parts)
+        if in_base.all() or not in_base.any():
+            return rows
+        # concat put the base rows first; put every row back where it was asked for
+        return rows.iloc[np.argsort(np.argsort(~in_base, kind='stable'))]
+
+    # Positions of the live orders with ids `order_ids`; ids not in the book are skipped
+    def locate(self, order_ids):
+        base = self.base.frame.index.get_indexer(order_ids)
+        tail = self.tail.frame.index.get_indexer(order_ids)
+        return np.concatenate([self._live(np.sort(base[base >= 0])), len(self.base) + tail[tail >= 0]])
+
+    # Row positions holding any of `values` in `column`, sorted ascending
+    def positions(self, column, values):
+        return self._join(self.base.positions(column, values), self.tail.positions(column, values))
+
+    # Values of `column` present in the book, sorted (categories of removed orders are left out)
+    def values(self, column):
+        if column not in self._values:
+            present = set(self.base.lookup(column))
+            if len(self.removed):
+                removed = self.base.frame[column].iloc[self.removed].value_counts()
+                lookup = self.base.lookup(column)
+                present -= {value for value, count in removed.items() if count and count == len(lookup[value])}
+            self._values[column] = sorted(present.union(self.tail.lookup(column)))
+        return self._values[column]
+
+    # Row positions with low <= Level <= high, sorted ascending
+    def level_range(self, low, high):
+        return self._join(self.base.level_range(low, high), self.tail.level_range(low, high))
+
+    # The first `stop` live row positions (all of them by default), or of `positions`,
+    # sorted by `column` ('Order ID' sorts by the index). Tied rows keep book order and
+    # missing values sort last in both directions, like a stable pandas sort_values.
+    def sort(self, column, ascending=True, positions=None, stop=None):
+        if positions is None:
+            order = self.base.order(column, ascending)
+            if not len(self.tail) and not len(self.removed):
+                return order[:stop]
+            # Only the first `stop` live base rows can make the page
+            if stop is not None:
+                order = order[:stop + len(self.removed)]
+            # Base rows in sorted order (ties in book order), then tail rows in book order
+            positions = np.concatenate([self._live(order), len(self.base) + np.arange(len(self.tail))])
+        primary, secondary = self._merged_keys(column, ascending, positions)
+        return positions[np.lexsort((secondary, primary))][:stop]
+
+    # Aggregates over the whole book: the base's, less removed rows, plus the tail's
+    def summary(self):
+        if self._summary is None:
+            summary = self.base.summary()
+            if len(self.removed) or len(self.tail):
+                removed = _summarize(self.base.frame.iloc[self.removed])
+                added = _summarize(self.tail.frame)
+                summary = tuple(_combine(total, less, more) for total, less, more in zip(summary, removed, added))
+            self._summary = summary
+        return self._summary
+
+    # Sort keys of `positions` in one space across base and tail: a base row's key is
+    # twice its dense rank; a tail row's is twice the rank of an equal base key, or the
+    # odd number between the base keys it falls between, broken by its rank in the tail.
+    # Missing values rank after everything in both directions.
+    def _merged_keys(self, column, ascending, positions):
+        rank, uniques = self.base.ranks(column)[1:]
+        missing = 2 * len(uniques)
+        in_base = positions < len(self.base)
+        primary = np.empty(len(positions), dtype=np.intp)
+        secondary = np.zeros(len(positions), dtype=np.intp)
+        primary[in_base] = 2 * rank[positions[in_base]]
+        if not in_base.all():
+            if column not in self._tail_keys:
+                self._tail_keys[column] = self._tail_sort_keys(column, uniques)
+            tail_primary, tail_secondary = self._tail_keys[column]
+            rows = positions[~in_base] - len(self.base)
+            primary[~in_base] = tail_primary[rows]
+            secondary[~in_base] = tail_secondary[rows]
+        if not ascending:
+            primary = np.where(primary == missing, missing + 2, -primary)
+            secondary = -secondary
+        return primary, secondary
+
+    def _tail_sort_keys(self, column, uniques):
+        keys = _sort_keys(self.tail.frame, column)
+        missing = pd.isna(keys)
+        present = keys[~missing]
+        slot = np.searchsorted(uniques, present)
+        equal = slot < len(uniques)
+        equal[equal] = uniques[slot[equal]] == present[equal]
+        primary = np.full(len(keys), 2 * len(uniques), dtype=np.intp)
+        secondary = np.zeros(len(keys), dtype=np.intp)
+        primary[~missing] = np.where(equal, 2 * slot, 2 * slot - 1)
+        secondary[~missing] = np.where(equal, 0, self.tail.ranks(column)[1][~missing])
+        return primary, secondary
+
+    # Live base positions followed by tail positions, from per-segment hits
+    def _join(self, base_hits, tail_hits):
+        return np.concatenate([self._live(base_hits), len(self.base) + tail_hits])
+
+    # `positions` in the base that were not removed, in their order
+    def _live(self, positions):
+        if not len(self.removed):
+            return positions
+        slot = np.searchsorted(self.removed, positions).clip(max=len(self.removed) - 1)
+        return positions[self.removed[slot] != positions]
+
+
+# One frame of the book and its indexes, each built on first use
+class _Segment:
+    def __init__(self, frame):
+        self.frame = frame
+        self._positions = {}
+        self._ranks = {}
+        self._orders = {}
+        self._levels = None
+        self._summary = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    # Value -> row positions for `column`
+    def lookup(self, column):
+        if column not in self._positions:
+            self._positions[column] = self.frame.groupby(column, observed=True, sort=False).indices
+        return self._positions[column]
+
+    def positions(self, column, values):
+        lookup = self.lookup(column)
+        hits = [lookup[value] for value in values if value in lookup]
+        if not hits:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(hits))
+
+    def level_range(self, low, high):
+        if self._levels is None:
+            levels = self.frame['Level'].to_numpy(dtype='float64', na_value=np.nan)
+            order = np.argsort(levels, kind='stable')
+            self._levels = (levels[order], order)
+        levels, order = self._levels
+        start = np.searchsorted(levels, low, side='left')
+        stop = np.searchsorted(levels, high, side='right')
+        return np.sort(order[start:stop])
+
+    # Stable ascending row order by `column`, each row's dense rank in it (missing values
+    # share the last rank) and the distinct present keys in sorted order
+    def ranks(self, column):
+        if column not in self._ranks:
+            self._ranks[column] = _dense_rank(_sort_keys(self.frame, column))
+        return self._ranks[column]
+
+    # Row order by `column` in either direction, ties in book order and missing values last
+    def order(self, column, ascending):
+        key = (column, ascending)
+        if key not in self._orders:
+            order, rank, uniques = self.ranks(column)
+            if not ascending:
+                valid = len(uniques)
+                order = np.argsort(np.where(rank < valid, valid - 1 - rank, valid), kind='stable')
+            self._orders[key] = order
+        return self._orders[key]
+
+    def summary(self):
+        if self._summary is None:
+            self._summary = _summarize(self.frame)
+        return self._summary
+
+
+# Filter, sort and paginate the book through `index`; only the requested page is materialized
+def query_orders(index, filters=None, level_range=None, sort_by='Order ID', ascending=True, page=1, page_size=50):
+    selected = None
+    for column, values in (filters or {}).items():
+        if values:
+            hits = index.positions(column, values)
+            selected = hits if selected is None else np.intersect1d(selected, hits, assume_unique=True)
+    if level_range is not None:
+        hits = index.level_range(*level_range)
+        selected = hits if selected is None else np.intersect1d(selected, hits, assume_unique=True)
+
+    total = len(index) if selected is None else len(selected)
+    pages = max(1, -(-total // page_size))
+    page = min(max(1, page), pages)
+    start, stop = (page - 1) * page_size, page * page_size
+
+    positions = index.sort(sort_by, ascending, selected, stop)[start:]
+    if selected is None:
+        by_pair, by_lp = index.summary()
+    else:
+        by_pair, by_lp = _summarize(index.take(selected, ['CCY Pair', 'Liquidity Provider', 'Notional']))
+    return OrderPage(index.take(positions), total, page, pages, by_pair, by_lp)
+
+
+# Sort keys of `column` ('Order ID' sorts by the index)
+def _sort_keys(frame, column):
+    if column == 'Order ID':
+        return frame.index.to_numpy()
+    if not pd.api.types.is_numeric_dtype(frame[column]):
+        # Sort text and categoricals by label (not category code), blanks first
+        return frame[column].astype(object).fillna('').astype(str).to_numpy()
+    return frame[column].to_numpy(dtype='float64', na_value=np.nan)
+
+
+# Stable ascending order of sort keys (missing values last), each key's dense rank in
+# it with missing values sharing the last rank, and the distinct present keys in order
+def _dense_rank(keys):
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    missing = pd.isna(ordered)
+    starts = np.ones(len(keys), dtype=bool)
+    starts[1:] = (ordered[1:] != ordered[:-1]) & ~(missing[1:] & missing[:-1])
+    ranks = np.cumsum(starts) - 1
+    rank = np.empty(len(keys), dtype=np.intp)
+    rank[order] = ranks
+    return order, rank, ordered[starts & ~missing]
+
+
+# Order count and notional per pair and per LP
+def _summarize(frame):
+    summary = []
+    for column in ('CCY Pair', 'Liquidity Provider'):
+        notional = frame.groupby(column, observed=True)['Notional']
+        summary.append(pd.DataFrame({'Orders': notional.size(), 'Notional': notional.sum()}))
+    return tuple(summary)
+
+
+# `total` aggregates less `removed` plus `added`, dropping buckets left without orders
+def _combine(total, removed, added):
+    combined = pd.concat([total, -removed, added])
+    combined = combined.groupby(combined.index.astype(object)).sum()
+    return combined[combined['Orders'] > 0]
+
+
+# Concatenate order frames, unioning the categories of categorical columns so they stay categorical
+def concat_orders(frames):
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    frames = list(frames)
+    for column in frames[0].columns:
+        dtypes = [frame[column].dtype for frame in frames]
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and \
+                any(dtype != dtypes[0] for dtype in dtypes):
+            categories = dtypes[0].categories
+            for dtype in dtypes[1:]:
+                categories = categories.append(dtype.categories.difference(categories))
+            for position, frame in enumerate(frames):
+                frames[position] = frame.assign(**{column: frame[column].cat.set_categories(categories)})
+    return pd.concat(frames)
+
+
+# Add the latest Spot and the Level's distance from it (%) to a page of orders.
+# `latest` maps a pair to its latest market snapshot (or None); it is called once per pair on the page.
+def with_market(rows, latest):
+    spots = {}
+    for pair in rows['CCY Pair'].dropna().unique():
+        snapshot = latest(pair)
+        if snapshot is not None:
+            spots[pair] = snapshot.spot
+    rows = rows.copy()
+    rows['Spot'] = rows['CCY Pair'].astype(object).map(spots).astype('float64')
+    rows['Distance to Level (%)'] = (rows['Level'] / rows['Spot'] - 1) * 100
+    return rows
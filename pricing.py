@@ -0,0 +1,246 @@
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import ndtr
+
+from structures import COST_SCALE, PAYOFFS, STRIKE_COLUMNS, STRUCTURES, normalize_ideas
+
+# Market inputs for one pair at one point in time.
+#   tenors:        tenor strings ('1w', '1m', ...) in increasing order
+#   forward_points: forward points per tenor, in pips
+#   vols:          ATM vols per tenor, as decimals (0.1 for 10%)
+#   rate:          continuously compounded quote-currency rate, as a decimal
+# All fields are hashable so a snapshot can key the pricing cache.
+MarketSnapshot = namedtuple('MarketSnapshot', ['pair', 'timestamp', 'spot', 'tenors', 'forward_points', 'vols', 'rate'],
+                            defaults=[0.0])
+
+_TENOR = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([dwmy])\s*$', re.IGNORECASE)
+_YEARS_PER_UNIT = {'d': 1 / 365, 'w': 7 / 365, 'm': 1 / 12, 'y': 1.0}
+
+# Relative spot bump for finite-difference deltas
+_DELTA_BUMP = 1e-4
+
+# Broadie-Glasserman shift for discretely monitored barriers in the Monte Carlo pricer
+_BARRIER_SHIFT = 0.5826
+
+# Simulated points (rows x paths x steps) the Monte Carlo pricer holds in memory at once
+_MC_CHUNK = 2 ** 22
+
+
+# Convert a tenor such as '1m', '2w', '10d' or '1y' into years
+def tenor_to_years(tenor):
+    match = _TENOR.match(str(tenor))
+    if match is None:
+        raise ValueError(f"Unrecognised tenor {tenor!r}; expected e.g. '1w', '1m' or '1y'")
+    return float(match.group(1)) * _YEARS_PER_UNIT[match.group(2).lower()]
+
+
+# Size of one forward point for a pair
+def pip_size(pair):
+    return 0.01 if pair.endswith('JPY') else 0.0001
+
+
+# Spot, forward and vol for `tenor`: forward points interpolate linearly in time and
+# vols linearly in total variance, flat outside the quoted tenors
+def market_for_tenor(snapshot, tenor):
+    years = tenor_to_years(tenor)
+    quoted = np.array([tenor_to_years(quoted_tenor) for quoted_tenor in snapshot.tenors])
+    points = np.interp(years, quoted, np.asarray(snapshot.forward_points, dtype='float64'))
+    variance = np.interp(years, quoted, np.asarray(snapshot.vols, dtype='float64') ** 2 * quoted) / years
+    forward = snapshot.spot + points * pip_size(snapshot.pair)
+    return snapshot.spot, forward, float(np.sqrt(variance)), years
+
+
+# Garman-Kohlhagen vanilla price per unit of base notional, in forward form
+def vanilla(forward, strike, years, vol, discount, is_call):
+    std = vol * np.sqrt(years)
+    d1 = (np.log(forward / strike) + 0.5 * std ** 2) / std
+    d2 = d1 - std
+    call = discount * (forward * ndtr(d1) - strike * ndtr(d2))
+    put = discount * (strike * ndtr(-d2) - forward * ndtr(-d1))
+    return np.where(is_call, call, put)
+
+
+# Cash-or-nothing digital paying 1 unit of the quote currency
+def digital(forward, strike, years, vol, discount, is_call):
+    std = vol * np.sqrt(years)
+    d2 = (np.log(forward / strike) - 0.5 * std ** 2) / std
+    return discount * ndtr(np.where(is_call, d2, -d2))
+
+
+# Continuously monitored knock-in vanilla (Reiner-Rubinstein, as in Haug's collection).
+# The barrier knocks in from the side spot starts on: down-and-in below spot, up-and-in above.
+# Barriers already breached price as the plain vanilla.
+def knock_in(spot, forward, strike, barrier, years, vol, discount, is_call):
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), np.shape(spot))
+    std = vol * np.sqrt(years)
+    carry = np.log(forward / spot) / years
+    mu = (carry - 0.5 * vol ** 2) / vol ** 2
+    phi = np.where(is_call, 1.0, -1.0)
+    down = barrier < spot
+    eta = np.where(down, 1.0, -1.0)
+    fwd_df, strike_df = forward * discount, strike * discount
+
+    x1 = np.log(spot / strike) / std + (1 + mu) * std
+    x2 = np.log(spot / barrier) / std + (1 + mu) * std
+    y1 = np.log(barrier ** 2 / (spot * strike)) / std + (1 + mu) * std
+    y2 = np.log(barrier / spot) / std + (1 + mu) * std
+    ratio = barrier / spot
+    a = phi * fwd_df * ndtr(phi * x1) - phi * strike_df * ndtr(phi * x1 - phi * std)
+    b = phi * fwd_df * ndtr(phi * x2) - phi * strike_df * ndtr(phi * x2 - phi * std)
+    c = (phi * fwd_df * ratio ** (2 * (mu + 1)) * ndtr(eta * y1)
+         - phi * strike_df * ratio ** (2 * mu) * ndtr(eta * y1 - eta * std))
+    d = (phi * fwd_df * ratio ** (2 * (mu + 1)) * ndtr(eta * y2)
+         - phi * strike_df * ratio ** (2 * mu) * ndtr(eta * y2 - eta * std))
+
+    above = strike > barrier
+    price = np.select(
+        [is_call & down, is_call & ~down, ~is_call & down],
+        [np.where(above, c, a - b + d), np.where(above, a, b - c + d), np.where(above, b - c + d, a)],
+        np.where(above, a - b + d, c))
+    breached = np.where(down, spot <= barrier, spot >= barrier)
+    return np.where(breached, vanilla(forward, strike, years, vol, discount, is_call), price)
+
+
+# Closed-form premium per unit of base notional (quote currency; 1 unit payout for digitals)
+def _closed_form(name, spot, forward, strikes, years, vol, discount):
+    k = [strikes[:, i] for i in range(strikes.shape[1])]
+    if name in ('call spread', 'put spread'):
+        is_call = name == 'call spread'
+        return (vanilla(forward, k[0], years, vol, discount, is_call)
+                - vanilla(forward, k[1], years, vol, discount, is_call))
+    if name in ('call spread RKI', 'put spread RKI'):
+        is_call = name == 'call spread RKI'
+        return (knock_in(spot, forward, k[0], k[2], years, vol, discount, is_call)
+                - knock_in(spot, forward, k[1], k[2], years, vol, discount, is_call))
+    if name == 'digital':
+        return digital(forward, k[0], years, vol, discount, k[0] >= spot)
+    if name in ('call ERKO', 'put ERKO', 'digi risk reversal'):
+        is_call = name != 'put ERKO'
+        # European knock-out = vanilla spread less a digital paying the spread width at the barrier
+        erko = (vanilla(forward, k[0], years, vol, discount, is_call)
+                - vanilla(forward, k[1], years, vol, discount, is_call)
+                - np.abs(k[1] - k[0]) * digital(forward, k[1], years, vol, discount, is_call))
+        erko = np.where(np.where(is_call, k[1] > k[0], k[1] < k[0]), erko, 0.0)
+        if name != 'digi risk reversal':
+            return erko
+        return erko - knock_in(spot, forward, k[0], k[2], years, vol, discount, False)
+    return None
+
+
+# Cumulative standard normal walks, scaled to unit variance at expiry, shared by every Monte Carlo price
+@lru_cache(maxsize=4)
+def _unit_walks(paths, steps, seed):
+    normals = np.random.default_rng(seed).standard_normal((paths, steps))
+    walks = np.cumsum(normals, axis=1) / np.sqrt(steps)
+    walks.flags.writeable = False
+    return walks
+
+
+# Monte Carlo premiums over `paths` simulated GBM paths per structure with shared normals, for spot
+# and forward scaled by each of `scales`; returns a (len(scales), n) array. Rows are simulated in
+# chunks, and since scaling spot and forward together scales whole paths, every scale reuses them.
+# Barriers are monitored on `steps` dates and shifted towards spot to approximate continuous monitoring.
+def _monte_carlo(name, spot, forward, strikes, years, vol, discount, scales=(1.0,), paths=20000, steps=64, seed=7):
+    unit_walks = _unit_walks(paths, steps, seed)
+    times = np.arange(1, steps + 1) / steps
+    shifted = strikes.copy()
+    if STRUCTURES[name].strike_labels[-1] == 'RKI':
+        shift = np.exp(_BARRIER_SHIFT * vol * np.sqrt(years / steps))
+        shifted[:, -1] = np.where(shifted[:, -1] < spot, shifted[:, -1] * shift, shifted[:, -1] / shift)
+
+    prices = np.empty((len(scales), len(spot)))
+    chunk = max(1, _MC_CHUNK // (paths * steps))
+    for start in range(0, len(spot), chunk):
+        rows = slice(start, start + chunk)
+        drift = np.log(forward[rows] / spot[rows]) - 0.5 * vol[rows] ** 2 * years[rows]
+        std = vol[rows] * np.sqrt(years[rows])
+        log_paths = drift[:, None, None] * times + std[:, None, None] * unit_walks
+        # Final, low and high of each path relative to spot at inception
+        final = np.exp(log_paths[:, :, -1]).reshape(-1)
+        low = np.exp(np.minimum(log_paths.min(axis=2), 0.0)).reshape(-1)
+        high = np.exp(np.maximum(log_paths.max(axis=2), 0.0)).reshape(-1)
+        row_strikes = np.repeat(shifted[rows], paths, axis=0)
+        for i, scale in enumerate(scales):
+            spot0 = np.repeat(spot[rows] * scale, paths)
+            values = PAYOFFS[name](spot0, final * spot0, low * spot0, high * spot0, row_strikes)
+            prices[i, rows] = discount[rows] * values.reshape(-1, paths).mean(axis=1)
+    return prices
+
+
+# Premium per unit of base notional for arrays of one structure; broadcasts market inputs
+def premium(name, spot, forward, strikes, years, vol, discount, method='closed'):
+    return _premiums(name, spot, forward, strikes, years, vol, discount, method)[0]
+
+
+# Premiums with spot and forward both scaled by each of `scales`, as a (len(scales), n) array.
+# Structures without a closed form, or method='monte carlo', fall back to simulation.
+def _premiums(name, spot, forward, strikes, years, vol, discount, method='closed', scales=(1.0,)):
+    strikes = np.atleast_2d(np.asarray(strikes, dtype='float64'))
+    spot, forward, years, vol, discount = (np.broadcast_to(np.asarray(value, dtype='float64'), len(strikes))
+                                           for value in (spot, forward, years, vol, discount))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if method == 'closed':
+            prices = [_closed_form(name, spot * scale, forward * scale, strikes, years, vol, discount)
+                      for scale in scales]
+            if prices[0] is not None:
+                return np.stack(prices)
+        return _monte_carlo(name, spot, forward, strikes, years, vol, discount, scales)
+
+
+# Premium in the structure's cost unit (bps of notional, or % of payout for digitals) and
+# spot delta in % of notional, for an (n, k) array of strikes on one structure
+def price_structures(name, strikes, spot, forward, years, vol, rate=0.0, method='closed'):
+    structure = STRUCTURES[name]
+    discount = np.exp(-rate * years)
+    bumps = _premiums(name, spot, forward, strikes, years, vol, discount, method,
+                      scales=(1.0, 1 + _DELTA_BUMP, 1 - _DELTA_BUMP))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (bumps[1] - bumps[2]) / (2 * spot * _DELTA_BUMP)
+        if structure.cost_unit == '%':
+            cost = bumps[0] * COST_SCALE['%']
+        else:
+            cost = bumps[0] / spot * COST_SCALE['bps']
+    return {'cost': cost, 'delta': delta * 100}
+
+
+_cache = OrderedDict()
+_CACHE_SIZE = 256
+# Streamlit runs sessions on separate threads that share the cache
+_cache_lock = threading.Lock()
+
+
+# Price a grid of strikes for one structure off a market snapshot, caching the result per
+# (snapshot, tenor, structure, strikes, method). Snapshots are immutable, so a new market
+# snapshot naturally misses the cache while reruns on the same inputs hit it.
+def price_grid(snapshot, tenor, name, strikes, method='closed'):
+    strikes = np.atleast_2d(np.asarray(strikes, dtype='float64'))
+    key = (snapshot, tenor, name, strikes.shape, strikes.tobytes(), method)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    spot, forward, vol, years = market_for_tenor(snapshot, tenor)
+    result = price_structures(name, strikes, spot, forward, years, vol, snapshot.rate, method)
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+# Fill the 'Cost' of every idea on the snapshot's pair with its model price; ideas on other
+# pairs or unknown structures keep their quoted cost
+def price_ideas(ideas, snapshot, tenor):
+    ideas = normalize_ideas(ideas)
+    on_pair = ideas[ideas['CCY Pair'] == snapshot.pair]
+    for name, group in on_pair.groupby('Structure', sort=False):
+        if name not in STRUCTURES:
+            continue
+        columns = STRIKE_COLUMNS[:len(STRUCTURES[name].strike_labels)]
+        priced = price_grid(snapshot, tenor, name, group[columns].to_numpy(dtype='float64'))
+        ideas.loc[group.index, 'Cost'] = priced['cost']
+    return ideas
@@ -0,0 +1,195 @@
+import asyncio
+import csv
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from pricing import pip_size
+
+# A quote from the tick stream
+Tick = namedtuple('Tick', ['timestamp', 'pair', 'bid', 'ask'])
+
+# A fill ('fill': the market traded through the level) or a 'near' alert for a working order
+QuoteEvent = namedtuple('QuoteEvent', ['kind', 'timestamp', 'order_id', 'pair', 'level', 'mid', 'distance_pips'])
+
+
+# Working order levels per pair, sorted so a tick only looks at the levels around it
+class LevelIndex:
+    def __init__(self, frame):
+        self.levels = {}
+        frame = frame[frame['Level'].notna() & (frame['Level'] > 0)]
+        pairs = frame['CCY Pair'].astype(object).to_numpy()
+        levels = frame['Level'].to_numpy(dtype='float64')
+        order_ids = frame.index.to_numpy()
+        for pair in set(pairs):
+            mask = pairs == pair
+            order = np.argsort(levels[mask], kind='stable')
+            self.levels[pair] = (levels[mask][order], order_ids[mask][order])
+
+    # Order ids and levels with low <= level <= high
+    def between(self, pair, low, high):
+        entry = self.levels.get(pair)
+        if entry is None:
+            return (), ()
+        levels, order_ids = entry
+        start, stop = np.searchsorted(levels, low, side='left'), np.searchsorted(levels, high, side='right')
+        return order_ids[start:stop], levels[start:stop]
+
+
+# Parse 'timestamp,pair,bid,ask' into a Tick
+def parse_tick(line):
+    timestamp, pair, bid, ask = line.strip().split(',')[:4]
+    return Tick(timestamp, pair, float(bid), float(ask))
+
+
+# Replay ticks from a CSV with timestamp,pair,bid,ask columns; `rate` caps ticks per second (0: no cap)
+async def replay_file(path, rate=0):
+    with open(path, newline='') as handle:
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if header is not None and header[:1] != ['timestamp']:
+            yield parse_tick(','.join(header))
+        for count, row in enumerate(reader, 1):
+            yield Tick(row[0], row[1], float(row[2]), float(row[3]))
+            if rate and count % 100 == 0:
+                await asyncio.sleep(100 / rate)
+            elif count % 1000 == 0:
+                # Let other tasks run during a flat-out replay
+                await asyncio.sleep(0)
+
+
+# Read 'timestamp,pair,bid,ask' lines from a TCP tick feed
+async def read_socket(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                yield parse_tick(line.decode())
+    finally:
+        writer.close()
+
+
+# Tick source factory for a 'host:port' TCP feed or a CSV file to replay
+def tick_source(spec, rate=0):
+    host, _, port = spec.rpartition(':')
+    if host and port.isdigit():
+        return lambda: read_socket(host, int(port))
+    return lambda: replay_file(spec, rate)
+
+
+# Quote-ingestion service watching the order book's working levels.
+#
+# Runs an asyncio loop on a background thread that consumes a tick source and
+# checks each tick against the LevelIndex: levels between the previous and the
+# current mid are reported as fills, levels within `alert_pips` of the mid as
+# near-level alerts (once each until the market moves away). The index is
+# rebuilt from the OrderStore only when the book changes. Events and the
+# latest quotes are left in thread-safe buffers for the Streamlit UI to read.
+# The service is shared by every session, so the alert distance is set once
+# per feed when it is started.
+class QuoteService:
+    def __init__(self, order_store, alert_pips=10.0, index_refresh=1.0, max_events=1000):
+        self.order_store = order_store
+        self.alert_pips = alert_pips
+        self.index_refresh = index_refresh
+        self.events = deque(maxlen=max_events)
+        self.quotes = {}
+        self.ticks = 0
+        self.error = None
+        self._book = order_store.refresh()
+        self._index = LevelIndex(self._book.frame)
+        self._indexed_at = time.monotonic()
+        self._mids = {}
+        self._near = {}
+        self._filled = set()
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Start consuming `source_factory()` (an async iterator of Ticks) on a background thread,
+    # alerting within `alert_pips` of working levels (default: keep the current distance)
+    def start(self, source_factory, alert_pips=None):
+        if self.running:
+            return
+        if alert_pips is not None:
+            self.alert_pips = alert_pips
+        self.error = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, args=(source_factory,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.running and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join(timeout=5)
+
+    def _run(self, source_factory):
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._consume(source_factory()))
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as error:
+            self.error = error
+        finally:
+            self._loop.close()
+
+    async def _consume(self, source):
+        async for tick in source:
+            self.on_tick(tick)
+
+    # Check one tick against the nearby working levels
+    def on_tick(self, tick):
+        self.ticks += 1
+        self._refresh_index()
+        pair, mid = tick.pair, (tick.bid + tick.ask) / 2
+        self.quotes[pair] = tick
+        pip = pip_size(pair)
+
+        previous = self._mids.get(pair)
+        self._mids[pair] = mid
+        if previous is not None and previous != mid:
+            order_ids, levels = self._index.between(pair, min(previous, mid), max(previous, mid))
+            for order_id, level in zip(order_ids, levels):
+                if order_id not in self._filled:
+                    self._filled.add(order_id)
+                    self.events.append(QuoteEvent('fill', tick.timestamp, int(order_id), pair, float(level), mid,
+                                                  float(mid - level) / pip))
+
+        window = self.alert_pips * pip
+        order_ids, levels = self._index.between(pair, mid - window, mid + window)
+        near = self._near.get(pair, set())
+        inside = set()
+        for order_id, level in zip(order_ids, levels):
+            if order_id in self._filled:
+                continue
+            inside.add(order_id)
+            if order_id not in near:
+                self.events.append(QuoteEvent('near', tick.timestamp, int(order_id), pair, float(level), mid,
+                                              float(mid - level) / pip))
+        # Orders that left the window are re-armed for the next approach
+        self._near[pair] = inside
+
+    def _refresh_index(self):
+        now = time.monotonic()
+        if now - self._indexed_at < self.index_refresh:
+            return
+        self._indexed_at = now
+        book = self.order_store.refresh()
+        if book is not self._book:
+            self._book = book
+            self._index = LevelIndex(book.frame)
+
+    # Most recent events first
+    def recent_events(self, limit=50):
+        return list(self.events)[::-1][:limit]
@@ -0,0 +1,244 @@
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from pricing import market_for_tenor, premium, price_structures
+from structures import STRUCTURES
+
+# An order's 'Structure' text parsed into a registered structure.
+#   sign: +1 for bought structures, -1 for sold ones ('Sell' in the text)
+ParsedStructure = namedtuple('ParsedStructure', ['name', 'strikes', 'tenor', 'sign'])
+
+# Dimensions the delta/vega ladders are rolled up by
+LADDER_DIMENSIONS = ['CCY Pair', 'Liquidity Provider', 'Client Name']
+
+# Upper edges (% of spot) of the barrier-proximity buckets
+BARRIER_BUCKETS = [0.5, 1.0, 2.0, 5.0, np.inf]
+BARRIER_LABELS = ['<0.5%', '0.5-1%', '1-2%', '2-5%', '>5%']
+
+GREEK_COLUMNS = ['Orders', 'Notional', 'Delta', 'Vega']
+
+# Ladder name -> the order dimensions it is bucketed by
+_LADDERS = {dimension: [dimension] for dimension in LADDER_DIMENSIONS}
+_LADDERS['Barrier Proximity'] = ['CCY Pair', 'Barrier Bucket']
+
+_TENOR = re.compile(r'\b(\d+(?:\.\d+)?[dwmy])\b', re.IGNORECASE)
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?![\w.])')
+# Longest names first so 'call spread RKI' wins over 'call spread'
+_NAMES = sorted(STRUCTURES, key=len, reverse=True)
+
+
+# Parse free text such as 'Buy 1m 150/155 call spread RKI 145' or 'put ERKO 1.08 1.05 2w'.
+# Strikes are the numbers in order of appearance; returns None when the structure is not
+# recognised, the strike count does not match or there is no tenor.
+@lru_cache(maxsize=65536)
+def parse_structure(text):
+    if not isinstance(text, str):
+        return None
+    lowered = text.lower()
+    name = next((name for name in _NAMES if name.lower() in lowered), None)
+    tenor = _TENOR.search(text)
+    if name is None or tenor is None:
+        return None
+    remainder = text[:tenor.start()] + ' ' + text[tenor.end():]
+    strikes = tuple(float(number) for number in _NUMBER.findall(remainder))
+    if len(strikes) != len(STRUCTURES[name].strike_labels):
+        return None
+    return ParsedStructure(name, strikes, tenor.group(1).lower(), -1 if 'sell' in lowered else 1)
+
+
+# Per-order greeks, priced in one batch per (pair, tenor, structure).
+#   orders:      order frame indexed by order id
+#   snapshot_of: maps a pair to its market snapshot (or None)
+# Delta is in base-currency notional, vega in quote currency per vol point and barrier
+# distance in % of spot to the nearest RKI/ERKO barrier. Unparsed or unpriced orders
+# keep zero greeks with Priced=False.
+def order_greeks(orders, snapshot_of):
+    parsed = [parse_structure(text) for text in orders['Structure'].tolist()]
+    greeks = pd.DataFrame({
+        'CCY Pair': orders['CCY Pair'].astype(object).fillna('').to_numpy(),
+        'Liquidity Provider': orders['Liquidity Provider'].astype(object).fillna('').to_numpy(),
+        'Client Name': orders['Client Name'].astype(object).fillna('').to_numpy(),
+        'Structure Type': [entry.name if entry else None for entry in parsed],
+        'Orders': 1,
+        'Notional': orders['Notional'].fillna(0).to_numpy(dtype='float64'),
+        'Delta': 0.0, 'Vega': 0.0, 'Barrier Distance (%)': np.nan, 'Priced': False,
+    }, index=orders.index)
+    greeks['Tenor'] = [entry.tenor if entry else None for entry in parsed]
+    signs = np.array([entry.sign if entry else 0 for entry in parsed], dtype='float64')
+    strike_matrix = np.array([entry.strikes + (np.nan,) * (3 - len(entry.strikes)) if entry else (np.nan,) * 3
+                              for entry in parsed], dtype='float64').reshape(len(parsed), 3)
+
+    position = pd.Series(np.arange(len(greeks)), index=greeks.index)
+    groups = greeks[greeks['Structure Type'].notna()].groupby(['CCY Pair', 'Tenor', 'Structure Type'], sort=False)
+    for (pair, tenor, name), group in groups:
+        snapshot = snapshot_of(pair) if pair else None
+        if snapshot is None:
+            continue
+        try:
+            spot, forward, vol, years = market_for_tenor(snapshot, tenor)
+        except ValueError:
+            continue
+        rows = position[group.index].to_numpy()
+        strikes = strike_matrix[rows, :len(STRUCTURES[name].strike_labels)]
+        notional = greeks['Notional'].to_numpy()[rows] * signs[rows]
+        priced = price_structures(name, strikes, spot, forward, years, vol, snapshot.rate)
+        discount = np.exp(-snapshot.rate * years)
+        vega = (premium(name, spot, forward, strikes, years, vol + 0.01, discount)
+                - premium(name, spot, forward, strikes, years, vol, discount))
+        greeks.loc[group.index, 'Delta'] = np.nan_to_num(priced['delta'] / 100 * notional)
+        greeks.loc[group.index, 'Vega'] = np.nan_to_num(vega * notional)
+        greeks.loc[group.index, 'Priced'] = np.isfinite(priced['cost'])
+
+        labels = STRUCTURES[name].strike_labels
+        barriers = [labels.index(label) for label in ('RKI', 'ERKO') if label in labels]
+        if barriers:
+            distance = np.abs(strikes[:, barriers] / spot - 1).min(axis=1) * 100
+            greeks.loc[group.index, 'Barrier Distance (%)'] = distance
+
+    greeks['Barrier Bucket'] = pd.cut(greeks['Barrier Distance (%)'], [0.0] + BARRIER_BUCKETS,
+                                      labels=BARRIER_LABELS, include_lowest=True).astype(object).fillna('No Barrier')
+    return greeks
+
+
+# Sum greeks into buckets of `dimensions`
+def rollup(greeks, dimensions):
+    return greeks.groupby(dimensions)[GREEK_COLUMNS].sum()
+
+
+# Greek rows kept outside the consolidated base before it is rebuilt
+TAIL_LIMIT = 5_000
+
+
+# Risk aggregation over the order book.
+#
+# Keeps per-order greeks and delta/vega ladders by pair, LP and client plus a
+# barrier-proximity ladder by pair. update() replays the order store's changes
+# since the last call (OrderStore.changes_since), prices only the added orders
+# and those on pairs whose market snapshot changed, and adjusts just the buckets
+# they fall in; reprice() is the full batched job. Like the order book, the
+# greeks are a base frame with removed rows masked out plus a small tail of newly
+# priced rows, consolidated past TAIL_LIMIT, so an update costs O(changes) rather
+# than O(N). `greeks` materializes them as one frame.
+class RiskBook:
+    def __init__(self, order_store, market_data):
+        self.order_store = order_store
+        self.market_data = market_data
+        self.ladders = {}
+        self.unpriced = 0
+        self._base = order_greeks(order_store.book.base.frame.iloc[:0], lambda pair: None)
+        self._tail = self._base
+        self._removed = np.empty(0, dtype=np.intp)
+        self._greeks = self._base
+        self._pair_positions = None
+        self._version = None
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self.reprice()
+
+    # Per-order greeks of the whole book
+    @property
+    def greeks(self):
+        if self._greeks is None:
+            base = self._base
+            if len(self._removed):
+                keep = np.ones(len(base), dtype=bool)
+                keep[self._removed] = False
+                base = base.iloc[keep]
+            self._greeks = pd.concat([base, self._tail]) if len(self._tail) else base
+        return self._greeks
+
+    # Reprice every order and rebuild all ladders
+    def reprice(self):
+        with self._lock:
+            self._reprice()
+
+    # Apply orders added/removed since the last call and pairs with new market data
+    def update(self):
+        with self._lock:
+            book = self.order_store.refresh()
+            stale = [pair for pair, snapshot in self._snapshots.items() if self.market_data.latest(pair) != snapshot]
+            if book.version == self._version and not stale:
+                return
+            changes = self.order_store.changes_since(self._version)
+            if changes is None:
+                self._reprice()
+                return
+            added, removed, self._version = changes
+            if stale:
+                # Reprice every order on a moved pair: drop its greeks and price it again
+                moved = self._ids_on(stale)
+                orders = self.order_store.book
+                removed = removed + list(moved)
+                added = pd.concat([added, orders.take(orders.locate(moved))]) if len(moved) else added
+                for pair in stale:
+                    self._snapshots.pop(pair, None)
+            old = self._drop(removed)
+            if old.empty and added.empty:
+                return
+            new = order_greeks(added, self._snapshot_of)
+            self._record_snapshots(new)
+            self._tail = pd.concat([self._tail, new]) if len(self._tail) else new
+            self._greeks = None
+            if len(self._tail) + len(self._removed) > TAIL_LIMIT:
+                self._consolidate(self.greeks)
+            self.unpriced += int((~new['Priced']).sum()) - int((~old['Priced']).sum())
+            for key, dimensions in _LADDERS.items():
+                ladder = self.ladders[key].sub(rollup(old, dimensions), fill_value=0)
+                ladder = ladder.add(rollup(new, dimensions), fill_value=0)
+                self.ladders[key] = ladder[ladder['Orders'] > 0].astype({'Orders': 'int64'})
+
+    def _reprice(self):
+        book = self.order_store.refresh()
+        self._snapshots = {}
+        greeks = order_greeks(book.frame, self._snapshot_of)
+        self._record_snapshots(greeks)
+        self._consolidate(greeks)
+        self._version = book.version
+        self.unpriced = int((~greeks['Priced']).sum())
+        self.ladders = {key: rollup(greeks, dimensions) for key, dimensions in _LADDERS.items()}
+
+    def _consolidate(self, greeks):
+        self._base = self._greeks = greeks
+        self._tail = greeks.iloc[:0]
+        self._removed = np.empty(0, dtype=np.intp)
+        self._pair_positions = None
+
+    # Ids of the priced orders on `pairs`
+    def _ids_on(self, pairs):
+        if self._pair_positions is None:
+            self._pair_positions = self._base.groupby('CCY Pair', sort=False).indices
+        positions = [self._pair_positions[pair] for pair in pairs if pair in self._pair_positions]
+        positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.intp)
+        positions = np.setdiff1d(positions, self._removed, assume_unique=True)
+        return self._base.index[positions].append(self._tail.index[self._tail['CCY Pair'].isin(pairs)])
+
+    # Remove the greeks of `order_ids` (ids without greeks are skipped); returns the removed rows
+    def _drop(self, order_ids):
+        if not len(order_ids):
+            return self._base.iloc[:0]
+        found = self._base.index.get_indexer(order_ids)
+        found = np.setdiff1d(found[found >= 0], self._removed)
+        in_tail = self._tail.index.isin(order_ids)
+        old = pd.concat([self._base.iloc[found], self._tail[in_tail]])
+        self._removed = np.union1d(self._removed, found)
+        self._tail = self._tail[~in_tail]
+        self._greeks = None
+        return old
+
+    # Remember the snapshot of every pair in `greeks`, including pairs with nothing priced,
+    # so update() only treats a pair as stale once its market data actually changes
+    def _record_snapshots(self, greeks):
+        for pair in greeks['CCY Pair'].unique():
+            if pair:
+                self._snapshot_of(pair)
+
+    def _snapshot_of(self, pair):
+        if pair not in self._snapshots:
+            self._snapshots[pair] = self.market_data.latest(pair)
+        return self._snapshots[pair]
+
@@ -0,0 +1,210 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# A tradeable structure in the Trade Idea Generator.
+#   strike_labels: labels of the strike inputs, in order
+#   cost_unit:     'bps' of notional, or '%' of payout for digitals
+#   payout_legs:   (i, j) strikes whose distance |K_j - K_i| / K_i is the max payout;
+#                  None for structures paying a fixed 100%
+#   quote_legs:    (i, j) strikes whose distance the desk quotes leverage on. This is the
+#                  payout width except for RKI structures, which are quoted on the distance
+#                  from the first strike to the barrier
+#   direction:     'call' or 'put' for the side the structure pays on, None if either
+Structure = namedtuple('Structure', ['name', 'strike_labels', 'cost_unit', 'payout_legs', 'quote_legs', 'direction'])
+
+# Divisor turning a quoted cost into a fraction of notional/payout
+COST_SCALE = {'bps': 10000.0, '%': 100.0}
+
+# Strike columns used for batches of ideas
+STRIKE_COLUMNS = ['Strike 1', 'Strike 2', 'Strike 3']
+
+# Columns of a batch of ideas, in display order
+IDEA_COLUMNS = ['CCY Pair', 'Structure'] + STRIKE_COLUMNS + ['Cost']
+
+STRUCTURES = {}
+
+# Expiry payoff per structure, see payoff()
+PAYOFFS = {}
+
+
+# Add a structure to the registry
+def register(structure):
+    STRUCTURES[structure.name] = structure
+    return structure
+
+
+register(Structure('call spread', ['Strike 1', 'Strike 2'], 'bps', (0, 1), (0, 1), 'call'))
+register(Structure('put spread', ['Strike 1', 'Strike 2'], 'bps', (0, 1), (0, 1), 'put'))
+register(Structure('call spread RKI', ['Strike 1', 'Strike 2', 'RKI'], 'bps', (0, 1), (0, 2), 'call'))
+register(Structure('put spread RKI', ['Strike 1', 'Strike 2', 'RKI'], 'bps', (0, 1), (0, 2), 'put'))
+register(Structure('digital', ['Strike 1'], '%', None, None, None))
+register(Structure('call ERKO', ['Strike 1', 'ERKO'], 'bps', (0, 1), (0, 1), 'call'))
+register(Structure('put ERKO', ['Strike 1', 'ERKO'], 'bps', (0, 1), (0, 1), 'put'))
+register(Structure('digi risk reversal', ['Strike 1', 'ERKO', 'RKI'], 'bps', (0, 1), (0, 2), 'call'))
+
+
+# Register fn(spot0, final, low, high, strikes) as the payoff of structure `name`
+def payoff_for(name):
+    def decorator(fn):
+        PAYOFFS[name] = fn
+        return fn
+    return decorator
+
+
+# Payoff per unit of notional, in the quote currency (1.0 for a digital paying out), of
+# structure `name` over spot paths.
+#   paths:   (n, steps + 1) array, column 0 is spot at inception
+#   strikes: (n, k) or (k,) array of the structure's strikes
+# Knock-ins (RKI) trigger when the path touches the barrier from the inception side;
+# ERKO barriers are European and only checked at expiry. A digital pays when spot
+# finishes beyond its strike on the side away from inception spot.
+def payoff(name, paths, strikes):
+    paths = np.atleast_2d(np.asarray(paths, dtype='float64'))
+    strikes = np.atleast_2d(np.asarray(strikes, dtype='float64'))
+    return PAYOFFS[name](paths[:, 0], paths[:, -1], paths.min(axis=1), paths.max(axis=1), strikes)
+
+
+# Whether a knock-in barrier `barrier` was touched, starting from spot0
+def knocked_in(spot0, low, high, barrier):
+    return np.where(barrier < spot0, low <= barrier, high >= barrier)
+
+
+@payoff_for('call spread')
+def _call_spread(spot0, final, low, high, strikes):
+    return np.maximum(final - strikes[:, 0], 0) - np.maximum(final - strikes[:, 1], 0)
+
+
+@payoff_for('put spread')
+def _put_spread(spot0, final, low, high, strikes):
+    return np.maximum(strikes[:, 0] - final, 0) - np.maximum(strikes[:, 1] - final, 0)
+
+
+@payoff_for('call spread RKI')
+def _call_spread_rki(spot0, final, low, high, strikes):
+    return knocked_in(spot0, low, high, strikes[:, 2]) * _call_spread(spot0, final, low, high, strikes)
+
+
+@payoff_for('put spread RKI')
+def _put_spread_rki(spot0, final, low, high, strikes):
+    return knocked_in(spot0, low, high, strikes[:, 2]) * _put_spread(spot0, final, low, high, strikes)
+
+
+@payoff_for('digital')
+def _digital(spot0, final, low, high, strikes):
+    strike = strikes[:, 0]
+    return np.where(strike >= spot0, final > strike, final < strike).astype('float64')
+
+
+@payoff_for('call ERKO')
+def _call_erko(spot0, final, low, high, strikes):
+    return np.maximum(final - strikes[:, 0], 0) * (final < strikes[:, 1])
+
+
+@payoff_for('put ERKO')
+def _put_erko(spot0, final, low, high, strikes):
+    return np.maximum(strikes[:, 0] - final, 0) * (final > strikes[:, 1])
+
+
+# Long a call ERKO (strike, ERKO) financed by a short put on the same strike knocking in at RKI
+@payoff_for('digi risk reversal')
+def _digi_risk_reversal(spot0, final, low, high, strikes):
+    short_put = knocked_in(spot0, low, high, strikes[:, 2]) * np.maximum(strikes[:, 0] - final, 0)
+    return _call_erko(spot0, final, low, high, strikes) - short_put
+
+
+# Quoted leverage, quoted width, max payout and breakeven for arrays of ideas on one structure.
+#   strikes: (n, k) array, one row per idea with the structure's k strikes
+#   costs:   (n,) array of costs in the structure's cost unit
+# Leverage is the quoted width (the quote_legs distance, the desk's convention) over the
+# cost; max payout is the most the structure can pay (the payout_legs distance). Both are
+# fractions of notional (1.0 for digitals). Ideas with zero cost or a zero first strike
+# get zero leverage.
+def evaluate(name, strikes, costs):
+    structure = STRUCTURES[name]
+    strikes = np.atleast_2d(np.asarray(strikes, dtype='float64'))
+    costs = np.asarray(costs, dtype='float64').reshape(-1)
+    cost_fraction = costs / COST_SCALE[structure.cost_unit]
+    base = strikes[:, 0]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quoted_width = _width(structure.quote_legs, strikes)
+        max_payout = _width(structure.payout_legs, strikes)
+        leverage = quoted_width / cost_fraction
+    valid = (cost_fraction != 0) & (base != 0) & np.isfinite(leverage)
+    leverage = np.where(valid, leverage, 0.0)
+    quoted_width = np.where(base != 0, quoted_width, 0.0)
+    max_payout = np.where(base != 0, max_payout, 0.0)
+
+    if structure.direction == 'call':
+        breakeven = base * (1 + cost_fraction)
+    elif structure.direction == 'put':
+        breakeven = base * (1 - cost_fraction)
+    else:
+        breakeven = base.copy()
+    return {'leverage': leverage, 'quoted_width': quoted_width, 'max_payout': max_payout, 'breakeven': breakeven}
+
+
+# Distance |K_j - K_i| / K_i between two legs, or 1.0 for structures paying a fixed 100%
+def _width(legs, strikes):
+    if legs is None:
+        return np.ones(len(strikes))
+    first, second = legs
+    return np.abs(strikes[:, second] - strikes[:, first]) / strikes[:, first]
+
+
+# Reindex a frame of ideas to IDEA_COLUMNS: missing columns come back blank and strikes
+# or costs that are not numbers become NaN
+def normalize_ideas(ideas):
+    ideas = ideas.reindex(columns=IDEA_COLUMNS)
+    numeric = STRIKE_COLUMNS + ['Cost']
+    ideas[numeric] = ideas[numeric].apply(pd.to_numeric, errors='coerce')
+    return ideas
+
+
+# Candidate ideas for structure `name` on every pair in `spots` (pair -> spot), one per
+# combination of strikes from `strike_grids`: one array per strike label, as multiples
+# of spot. Combinations whose second strike is not on the paying side of the first are
+# skipped. Costs are left blank for the pricer to fill.
+def generate_ideas(spots, name, strike_grids):
+    structure = STRUCTURES[name]
+    if len(strike_grids) != len(structure.strike_labels):
+        raise ValueError(f"{name} takes {len(structure.strike_labels)} strikes, got {len(strike_grids)} grids")
+    grids = [np.asarray(grid, dtype='float64').reshape(-1) for grid in strike_grids]
+    # Rounded so grids built with float steps don't yield near-identical strikes
+    relative = np.round(np.stack(np.meshgrid(*grids, indexing='ij'), axis=-1).reshape(-1, len(grids)), 10)
+    if structure.direction is not None and len(grids) > 1:
+        sign = 1 if structure.direction == 'call' else -1
+        relative = relative[np.sign(relative[:, 1] - relative[:, 0]) == sign]
+
+    frames = []
+    for pair, spot in spots.items():
+        frame = pd.DataFrame(relative * spot, columns=STRIKE_COLUMNS[:len(grids)])
+        frame.insert(0, 'Structure', name)
+        frame.insert(0, 'CCY Pair', pair)
+        frames.append(frame)
+    if not frames:
+        return normalize_ideas(pd.DataFrame())
+    return normalize_ideas(pd.concat(frames, ignore_index=True))
+
+
+# Evaluate a frame of ideas with 'Structure', 'Strike 1'..'Strike 3' and 'Cost' columns,
+# one vectorized pass per structure, and return it ranked by leverage. Ideas on unknown
+# structures or with missing strikes/costs are ranked last with blank results.
+def evaluate_ideas(ideas):
+    ideas = normalize_ideas(ideas).reset_index(drop=True)
+    results = pd.DataFrame(index=ideas.index, columns=['Leverage', 'Quoted Width (%)', 'Max Payout (%)', 'Breakeven'],
+                           dtype='float64')
+    for name, group in ideas.groupby('Structure', sort=False):
+        if name not in STRUCTURES:
+            continue
+        columns = STRIKE_COLUMNS[:len(STRUCTURES[name].strike_labels)]
+        group = group[group[columns + ['Cost']].notna().all(axis=1)]
+        evaluated = evaluate(name, group[columns].to_numpy(dtype='float64'), group['Cost'].to_numpy(dtype='float64'))
+        results.loc[group.index, 'Leverage'] = evaluated['leverage']
+        results.loc[group.index, 'Quoted Width (%)'] = evaluated['quoted_width'] * 100
+        results.loc[group.index, 'Max Payout (%)'] = evaluated['max_payout'] * 100
+        results.loc[group.index, 'Breakeven'] = evaluated['breakeven']
+    ranked = pd.concat([ideas, results], axis=1)
+    return ranked.sort_values('Leverage', ascending=False, na_position='last', kind='stable')
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_journal import OrderJournal  # noqa: E402
+
+
+# A fresh order journal in a temporary directory
+@pytest.fixture
+def journal(tmp_path):
+    journal = OrderJournal(str(tmp_path / "orders.db"))
+    yield journal
+    journal.close()
@@ -0,0 +1,4 @@
+# A journal row for `client`; any other order column can be overridden by keyword
+def order(client='Acme', pair='EURUSD', level=1.08, **extra):
+    return {'Client Name': client, 'CCY Pair': pair, 'Structure': 'Buy 1m 1.08/1.10 call spread',
+            'Liquidity Provider': 'GS', 'Level': level, 'Client Fill Level': level, 'Notional': 1e6, **extra}
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest_pairs, backtest_structure, load_spot_history
+
+
+def test_rising_market_pays_call_spread_in_full():
+    spots = 100 * 1.001 ** np.arange(300)
+    dates = pd.date_range('2020-01-01', periods=300)
+    result = backtest_structure('call spread', dates, spots, [1.0, 1.01], '1m', 50)
+    steps = round(252 / 12)
+    assert result.summary['Starts'] == len(result.payouts) == 300 - steps
+    assert np.allclose(result.payouts, 0.01)
+    assert result.summary['Hit Rate (%)'] == 100
+    assert result.summary['Max Realized Leverage'] == pytest.approx(result.summary['Max Leverage'])
+
+
+def test_rki_needs_the_barrier_touched():
+    flat = np.full(100, 100.0)
+    spots = np.concatenate([flat, 100 * 1.002 ** np.arange(100)])
+    result = backtest_structure('call spread RKI', pd.date_range('2020-01-01', periods=200), spots,
+                                [1.0, 1.02, 0.99], '1m', 50)
+    # The market never dips to the barrier, so nothing pays however far it rallies
+    assert result.summary['RKI Hit Rate (%)'] == 0
+    assert not result.payouts.any()
+
+
+def test_short_history_returns_no_starts():
+    result = backtest_structure('digital', pd.date_range('2020-01-01', periods=5), np.ones(5), [1.01], '1m', 30)
+    assert result.summary == {'Starts': 0, 'Quoted Leverage': pytest.approx(1 / 0.3), 'Max Leverage': pytest.approx(1 / 0.3)}
+
+
+def test_load_spot_history_from_csv_directory(tmp_path):
+    pd.DataFrame({'date': ['2020-01-02', '2020-01-01'], 'spot': [1.1, 1.0]}).to_csv(tmp_path / "EURUSD.csv",
+                                                                                     index=False)
+    dates, spots = load_spot_history(str(tmp_path), 'EURUSD')
+    assert list(spots) == [1.0, 1.1]
+    assert len(load_spot_history(str(tmp_path), 'USDJPY')[1]) == 0
+
+
+def test_load_spot_history_does_not_write_to_source(tmp_path):
+    os.makedirs(tmp_path / "history")
+    dates, spots = load_spot_history(str(tmp_path), 'EURUSD')
+    assert len(spots) == 0
+    assert os.listdir(tmp_path) == ['history']
+
+
+def test_backtest_pairs_summarizes_per_pair(tmp_path):
+    for pair, drift in (('EURUSD', 1.001), ('USDJPY', 0.999)):
+        pd.DataFrame({'date': pd.date_range('2020-01-01', periods=100),
+                      'spot': 100 * drift ** np.arange(100)}).to_csv(tmp_path / f"{pair}.csv", index=False)
+    summary, results = backtest_pairs(str(tmp_path), ['EURUSD', 'USDJPY'], 'call spread', [1.0, 1.01], '1m', 50,
+                                      processes=1)
+    assert list(summary.index) == ['EURUSD', 'USDJPY']
+    assert summary.loc['EURUSD', 'Hit Rate (%)'] == 100
+    assert summary.loc['USDJPY', 'Hit Rate (%)'] == 0
+    assert set(results) == {'EURUSD', 'USDJPY'}
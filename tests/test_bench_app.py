@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from benchmarks import bench_app
+
+
+@pytest.fixture
+def baselines(tmp_path, monkeypatch):
+    path = tmp_path / "baselines.json"
+    monkeypatch.setattr(bench_app, 'BASELINES', str(path))
+    return path
+
+
+# Replace the timed paths with fixed results, in seconds
+@pytest.fixture
+def timings(monkeypatch):
+    results = {}
+    monkeypatch.setattr(bench_app, 'bench_size', lambda size, directory, market_data: dict(results))
+    return results
+
+
+def test_update_then_compare_on_a_tiny_book(baselines):
+    assert bench_app.main(['--sizes', '100', '--update-baselines']) == 0
+    recorded = json.loads(baselines.read_text())
+    assert set(recorded) == {'100'}
+    assert bench_app.INFO_PATHS <= set(recorded['100'])
+    # A generous tolerance keeps the rerun from flaking on a busy machine
+    assert bench_app.main(['--sizes', '100', '--tolerance', '100']) == 0
+
+
+def test_regression_fails_the_run(baselines, timings, capsys):
+    baselines.write_text(json.dumps({'100': {'render': 0.010}}))
+    timings['render'] = 0.020
+    assert bench_app.main(['--sizes', '100']) == 1
+    assert 'REGRESSION (baseline 10.00 ms)' in capsys.readouterr().out
+
+
+def test_slowdown_within_tolerance_passes(baselines, timings):
+    baselines.write_text(json.dumps({'100': {'render': 0.010}}))
+    timings['render'] = 0.014
+    assert bench_app.main(['--sizes', '100']) == 0
+    timings['render'] = 0.020
+    assert bench_app.main(['--sizes', '100', '--tolerance', '1.5']) == 0
+
+
+def test_sub_millisecond_slowdown_passes(baselines, timings):
+    baselines.write_text(json.dumps({'100': {'render': 0.0001}}))
+    timings['render'] = 0.0009
+    assert bench_app.main(['--sizes', '100']) == 0
+
+
+def test_info_paths_never_fail_the_run(baselines, timings, capsys):
+    path = next(iter(bench_app.INFO_PATHS))
+    baselines.write_text(json.dumps({'100': {path: 0.001}}))
+    timings[path] = 1.0
+    assert bench_app.main(['--sizes', '100']) == 0
+    assert '(info)' in capsys.readouterr().out
+
+
+def test_missing_baselines_file_passes(baselines, timings):
+    timings['render'] = 1.0
+    assert bench_app.main(['--sizes', '100']) == 0
+    assert not baselines.exists()
@@ -0,0 +1,51 @@
+import json
+import tracemalloc
+
+import instrumentation
+from instrumentation import RerunProfiler, profiling_requested
+
+
+def test_sections_round_trip_through_the_metrics_log(tmp_path):
+    log_path = tmp_path / "logs" / "metrics.log"
+    profiler = RerunProfiler(enabled=True, log_path=str(log_path))
+    profiler.checkpoint("Load")
+    sections = profiler.finish("Render")
+    assert profiler.finish("Render") is sections
+    assert [section['section'] for section in sections] == ["Load", "Render"]
+    record, = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert record['sections'] == sections
+    assert record['total_ms'] == profiler.total_ms == sum(section['ms'] for section in sections)
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = RerunProfiler(log_path=str(tmp_path / "metrics.log"))
+    profiler.checkpoint("Load")
+    assert profiler.finish() == [] and profiler.sections == []
+    assert not (tmp_path / "metrics.log").exists()
+
+
+def test_memory_sections_and_tracing_released(tmp_path):
+    assert not tracemalloc.is_tracing()
+    profiler = RerunProfiler(enabled=True, log_path=str(tmp_path / "metrics.log"), trace_memory=True)
+    assert tracemalloc.is_tracing()
+    blocks = [bytearray(1024) for _ in range(100)]
+    section, = profiler.finish("Allocate")
+    assert section['alloc_kb'] >= 100 and section['peak_kb'] >= section['alloc_kb']
+    assert not tracemalloc.is_tracing()
+    del blocks
+
+
+def test_interrupted_rerun_releases_tracing(tmp_path):
+    profiler = RerunProfiler(enabled=True, log_path=str(tmp_path / "metrics.log"), trace_memory=True)
+    profiler.checkpoint("Load")
+    del profiler
+    assert instrumentation._tracers == 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiling_requested_by_query_param(monkeypatch):
+    monkeypatch.delenv(instrumentation.PROFILE_ENV, raising=False)
+    assert profiling_requested({'debug': '1'}) and profiling_requested({'debug': ['true']})
+    assert not profiling_requested({}) and not profiling_requested({'debug': []})
+    monkeypatch.setenv(instrumentation.PROFILE_ENV, "yes")
+    assert profiling_requested({})
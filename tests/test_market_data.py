@@ -0,0 +1,80 @@
+import os
+
+import pandas as pd
+import pytest
+
+from market_data import MarketDataStore
+
+
+def drop(path, stamps, spot=1.08, pair='EURUSD', tenors=('1m', '3m')):
+    rows = [{'timestamp': stamp, 'pair': pair, 'tenor': tenor, 'spot': spot, 'forward_points': 0.001, 'vol': 8.0}
+            for stamp in stamps for tenor in tenors]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    # Give every write a distinct signature even within the filesystem's mtime resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MarketDataStore(str(tmp_path / "market"))
+
+
+def test_ingest_then_latest_and_as_of(store):
+    drop(os.path.join(store.incoming, "a.csv"), ['2024-01-01 10:00', '2024-01-01 11:00'], tenors=('1m', '3m', '5y'))
+    assert store.ingest() == 2
+    latest = store.latest('EURUSD')
+    assert latest.timestamp == pd.Timestamp('2024-01-01 11:00', tz='UTC').value
+    # Tenors off the grid are dropped and vols are stored as decimals
+    assert latest.tenors == ('1m', '3m') and latest.vols == (0.08, 0.08)
+    assert store.as_of('EURUSD', '2024-01-01 10:30').timestamp == pd.Timestamp('2024-01-01 10:00', tz='UTC').value
+    assert store.as_of('EURUSD', '2023-12-31') is None
+    assert store.latest('USDJPY') is None
+    assert store.pairs() == ['EURUSD']
+
+
+def test_repolling_unchanged_file_adds_nothing(store):
+    drop(os.path.join(store.incoming, "a.csv"), ['2024-01-01 10:00'])
+    assert store.ingest() == 1
+    assert store.ingest() == 0
+    assert MarketDataStore(store.root).ingest() == 0
+    assert len(store.spot_history('EURUSD')[0]) == 1
+
+
+def test_older_drop_merges_in_order(store):
+    drop(os.path.join(store.incoming, "a.csv"), ['2024-01-01 10:00', '2024-01-01 12:00'], spot=1.0)
+    store.ingest()
+    assert store.latest('EURUSD').spot == 1.0
+    drop(os.path.join(store.incoming, "b.csv"), ['2024-01-01 11:00'], spot=2.0)
+    assert store.ingest() == 1
+    stamps, spots = store.spot_history('EURUSD')
+    assert list(stamps) == sorted(stamps) and list(spots) == [1.0, 2.0, 1.0]
+    assert store.as_of('EURUSD', '2024-01-01 11:30').spot == 2.0
+
+
+def test_rewritten_drop_replaces_rows_with_the_same_timestamp(store):
+    path = os.path.join(store.incoming, "a.csv")
+    drop(path, ['2024-01-01 10:00', '2024-01-01 11:00'], spot=1.0)
+    store.ingest()
+    assert store.latest('EURUSD').spot == 1.0
+    drop(path, ['2024-01-01 11:00'], spot=1.5)
+    assert store.ingest() == 0
+    stamps, spots = store.spot_history('EURUSD')
+    assert len(stamps) == 2 and list(spots) == [1.0, 1.5]
+    assert store.latest('EURUSD').spot == 1.5
+
+
+def test_malformed_drop_is_skipped_and_not_retried(store, monkeypatch):
+    bad = os.path.join(store.incoming, "a.csv")
+    pd.DataFrame({'timestamp': ['2024-01-01'], 'spot': [1.0]}).to_csv(bad, index=False)
+    drop(os.path.join(store.incoming, "b.csv"), ['2024-01-01 10:00'])
+    assert store.ingest() == 1
+    assert list(store.rejected) == ['a.csv'] and 'missing columns' in store.rejected['a.csv']
+    assert store.latest('EURUSD') is not None
+    # Neither the rejected file nor the good one is read again until it changes
+    monkeypatch.setattr('market_data._read_drop', lambda path: pytest.fail(f"re-read {path}"))
+    assert store.ingest() == 0
+    monkeypatch.undo()
+    drop(bad, ['2024-01-02'])
+    assert store.ingest() == 1
+    assert store.rejected == {}
@@ -0,0 +1,81 @@
+import sqlite3
+
+import pandas as pd
+
+from helpers import order
+from order_journal import ORDER_COLUMNS, OrderJournal
+
+
+def test_append_find_and_remove(journal):
+    first, second = journal.append([order('Acme'), order('Beta', pair='USDJPY', level=150.0)])
+    assert journal.seq == 1
+    assert list(journal.find(client='Beta').index) == [second]
+    assert journal.find(order_id=first).at[first, 'Level'] == 1.08
+    assert journal.clients() == ['Acme', 'Beta']
+
+    assert journal.remove([first]) == 1
+    assert journal.remove([first]) == 0
+    assert list(journal.live_orders().index) == [second]
+    assert journal.clients() == ['Beta']
+
+
+def test_blank_values_round_trip_as_missing(journal):
+    order_id, = journal.append([order(level=float('nan'), **{'Client Name': None})])
+    row = journal.live_orders().loc[order_id]
+    assert pd.isna(row['Level'])
+    assert row['Client Name'] is None
+
+
+def test_changes_since(journal):
+    kept, removed = journal.append([order('Acme'), order('Beta')])
+    seq = journal.seq
+    added, = journal.append([order('Gamma')])
+    journal.remove([removed])
+    changes, removed_ids, current = journal.changes_since(seq)
+    assert list(changes.index) == [added]
+    assert removed_ids == [removed]
+    assert current == journal.seq
+
+    # An order added and removed after `seq` shows up in neither list
+    transient, = journal.append([order('Delta')])
+    journal.remove([transient])
+    changes, removed_ids, _ = journal.changes_since(current)
+    assert changes.empty and removed_ids == []
+
+
+def test_compact_purges_tombstones_and_forces_reload(journal):
+    kept, removed = journal.append([order('Acme'), order('Beta')])
+    seq = journal.seq
+    journal.remove([removed])
+    assert journal.compact() == 1
+    assert journal.changes_since(seq) is None
+    assert journal.changes_since(journal.compacted_seq) is not None
+    assert list(journal.live_orders().index) == [kept]
+
+
+def test_import_csv_runs_once(journal, tmp_path):
+    path = tmp_path / "orders.csv"
+    pd.DataFrame([order('Acme'), order('Beta')]).drop(columns=['Notional']).to_csv(path, index=False)
+    assert journal.import_csv(str(path)) == 2
+    assert journal.import_csv(str(path)) == 0
+    live = journal.live_orders()
+    assert sorted(live['Client Name']) == ['Acme', 'Beta']
+    assert live['Notional'].isna().all()
+
+
+def test_migrates_journals_without_new_columns(tmp_path):
+    path = str(tmp_path / "old.db")
+    columns = [column for column in ORDER_COLUMNS.values() if column != 'notional']
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE orders (order_id INTEGER PRIMARY KEY AUTOINCREMENT, {', '.join(columns)}, "
+                 "created_seq INTEGER NOT NULL, deleted_seq INTEGER)")
+    conn.execute("INSERT INTO orders (client_name, created_seq) VALUES ('Acme', 1)")
+    conn.commit()
+    conn.close()
+
+    journal = OrderJournal(path)
+    order_id, = journal.append([order('Beta')])
+    live = journal.live_orders()
+    assert pd.isna(live['Notional'].iloc[0])
+    assert live.at[order_id, 'Notional'] == 1e6
+    journal.close()
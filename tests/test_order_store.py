@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from helpers import order
+from order_store import OrderStore
+from order_view import OrderIndex, query_orders
+
+
+# The incrementally maintained book, compared with a fresh load of the journal
+def assert_matches_reload(store, journal):
+    reloaded = OrderStore(journal).refresh().frame
+    frame = store.refresh().frame
+    pd.testing.assert_frame_equal(frame.sort_index(), reloaded.sort_index(), check_categorical=False)
+
+
+def test_applies_changes_incrementally(journal):
+    store = OrderStore(journal, poll_interval=0)
+    first, second = journal.append([order('Acme'), order('Beta')])
+    assert list(store.refresh().frame.index) == [first, second]
+
+    third, = journal.append([order('Gamma', pair='USDJPY')])
+    journal.remove([first])
+    frame = store.refresh().frame
+    assert list(frame.index) == [second, third]
+    assert 'Gamma' in frame['Client Name'].cat.categories
+    assert_matches_reload(store, journal)
+
+
+def test_rerun_without_writes_returns_same_book(journal):
+    store = OrderStore(journal, poll_interval=0)
+    journal.append([order()])
+    book = store.refresh()
+    assert store.refresh() is book
+    assert store.frame is book.frame
+
+
+def test_poll_interval_defers_until_invalidated(journal):
+    store = OrderStore(journal, poll_interval=3600)
+    store.refresh()
+    order_id, = journal.append([order()])
+    assert len(store.refresh()) == 0
+    store.invalidate()
+    assert list(store.refresh().frame.index) == [order_id]
+
+
+def test_reloads_after_compaction(journal):
+    store = OrderStore(journal, poll_interval=0)
+    kept, removed = journal.append([order('Acme'), order('Beta')])
+    store.refresh()
+    journal.remove([removed])
+    journal.append([order('Gamma')])
+    journal.compact()
+    assert len(store.refresh()) == 2
+    assert removed not in store.frame.index
+    assert_matches_reload(store, journal)
+
+
+def test_writes_go_to_the_tail_until_consolidated(journal):
+    store = OrderStore(journal, poll_interval=0, tail_limit=3)
+    journal.append([order('Acme'), order('Beta'), order('Gamma')])
+    base = store.refresh().base
+    first, = journal.append([order('Delta', pair='USDJPY')])
+    journal.remove([store.frame.index[0]])
+    book = store.refresh()
+    assert book.base is base and len(book.tail) == 1 and len(book.removed) == 1
+    assert 'Delta' in book.values('Client Name') and 'Acme' not in book.values('Client Name')
+    assert_matches_reload(store, journal)
+
+    journal.remove([first])
+    journal.append([order('Echo'), order('Foxtrot'), order('Golf')])
+    book = store.refresh()
+    assert book.base is not base and len(book.tail) == 0 and len(book.removed) == 0
+    assert book.frame['Client Name'].dtype == 'category'
+    assert_matches_reload(store, journal)
+
+
+def test_incremental_book_queries_match_a_fresh_index(journal):
+    store = OrderStore(journal, poll_interval=0, tail_limit=50)
+    rng = np.random.default_rng(3)
+    clients, pairs = ['Acme', 'Beta', 'Gamma', 'Delta'], ['EURUSD', 'USDJPY', 'GBPUSD']
+    for _ in range(12):
+        journal.append([order(rng.choice(clients), pair=rng.choice(pairs), level=float(rng.choice([1.0, 1.1, 1.2])))
+                        for _ in range(8)])
+        live = store.refresh().frame.index
+        journal.remove(list(rng.choice(live, size=min(3, len(live)), replace=False)))
+        book = store.refresh()
+        fresh = OrderIndex(OrderStore(journal).refresh().frame)
+        for query in ({}, {'filters': {'Client Name': ['Acme', 'Delta']}, 'sort_by': 'Level', 'ascending': False},
+                      {'level_range': (1.05, 1.25), 'sort_by': 'CCY Pair'}):
+            for page in (1, 2):
+                expected = query_orders(fresh, page=page, page_size=10, **query)
+                result = query_orders(book, page=page, page_size=10, **query)
+                assert list(result.rows.index) == list(expected.rows.index)
+                assert result.total == expected.total
+        assert book.values('CCY Pair') == fresh.values('CCY Pair')
+
+
+def test_changes_since_replays_versions(journal):
+    store = OrderStore(journal, poll_interval=0)
+    first, second = journal.append([order('Acme'), order('Beta')])
+    version = store.refresh().version
+    third, = journal.append([order('Gamma')])
+    store.refresh()
+    fourth, = journal.append([order('Delta')])
+    journal.remove([first, third])
+    store.refresh()
+    added, removed, current = store.changes_since(version)
+    assert current == store.book.version > version
+    # Gamma came and went within the window, so only Delta is reported as added
+    assert list(added.index) == [fourth] and sorted(removed) == sorted([first, third])
+    assert store.changes_since(current)[2] == current and store.changes_since(current)[0].empty
+
+    journal.compact()
+    journal.append([order('Echo')])
+    store.refresh()
+    assert store.changes_since(current) is None
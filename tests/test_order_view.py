@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from order_store import CATEGORICAL_COLUMNS, _categorize
+from order_view import OrderIndex, query_orders, with_market
+from pricing import MarketSnapshot
+
+
+# A small book with categorical columns, blank clients, missing levels and many tied sort keys
+@pytest.fixture
+def book():
+    rng = np.random.default_rng(7)
+    size = 240
+    levels = rng.choice([1.05, 1.08, 1.1, np.nan], size=size)
+    frame = pd.DataFrame({
+        'Client Name': rng.choice(['Acme', 'Beta', 'Gamma', None], size=size),
+        'CCY Pair': rng.choice(['EURUSD', 'USDJPY', 'GBPUSD'], size=size),
+        'Structure': rng.choice(['Buy 1m 1.08/1.10 call spread', 'Sell 3m 1.05 digital'], size=size),
+        'Liquidity Provider': rng.choice(['GS', 'JPM'], size=size),
+        'Level': levels,
+        'Client Fill Level': levels,
+        'Notional': rng.choice([1e6, 5e6], size=size),
+    }, index=pd.Index(np.arange(size) * 3 + 10, name='Order ID'))
+    return _categorize(frame)
+
+
+# The same book as a base with removed rows plus a tail with its own categories (and a new client)
+def segmented(book):
+    tail = book.iloc[160:].astype({column: object for column in CATEGORICAL_COLUMNS})
+    tail.loc[tail.index[::7], 'Client Name'] = 'Delta'
+    removed = np.array([0, 5, 17, 100, 159])
+    live = pd.concat([book.iloc[:160].drop(index=book.index[removed]), tail])
+    return OrderIndex(book.iloc[:160], _categorize(tail), removed), live
+
+
+@pytest.fixture(params=['whole', 'segmented'])
+def indexed(request, book):
+    if request.param == 'whole':
+        return OrderIndex(book), book
+    return segmented(book)
+
+
+# The page a plain pandas filter / stable sort / slice gives
+def expected_page(frame, filters, level_range, sort_by, ascending, page, page_size):
+    mask = np.ones(len(frame), dtype=bool)
+    for column, values in filters.items():
+        mask &= frame[column].isin(values).to_numpy()
+    if level_range is not None:
+        mask &= frame['Level'].between(*level_range).to_numpy()
+    rows = frame[mask]
+    if sort_by == 'Order ID':
+        rows = rows.sort_index(ascending=ascending, kind='stable')
+    elif pd.api.types.is_numeric_dtype(rows[sort_by]):
+        rows = rows.sort_values(sort_by, ascending=ascending, kind='stable')
+    else:
+        rows = rows.sort_values(sort_by, ascending=ascending, kind='stable',
+                                key=lambda values: values.astype(object).fillna('').astype(str))
+    return rows, rows.iloc[(page - 1) * page_size:page * page_size]
+
+
+@pytest.mark.parametrize('sort_by', ['Order ID', 'Client Name', 'CCY Pair', 'Level', 'Notional', 'Structure'])
+@pytest.mark.parametrize('ascending', [True, False])
+@pytest.mark.parametrize('filters, level_range', [
+    ({}, None),
+    ({'CCY Pair': ['EURUSD', 'GBPUSD']}, None),
+    ({'Client Name': ['Acme', 'Gamma'], 'Liquidity Provider': ['GS']}, None),
+    ({}, (1.06, 1.1)),
+    ({'Client Name': ['Beta']}, (1.0, 1.08)),
+])
+def test_pages_match_pandas(indexed, sort_by, ascending, filters, level_range):
+    index, book = indexed
+    for page in (1, 2, 3):
+        result = query_orders(index, filters, level_range, sort_by, ascending, page=page, page_size=40)
+        matching, rows = expected_page(book, filters, level_range, sort_by, ascending, result.page, 40)
+        assert result.total == len(matching)
+        assert list(result.rows.index) == list(rows.index)
+        pd.testing.assert_frame_equal(result.rows, rows, check_categorical=False, check_dtype=False)
+        expected_by_pair = matching.groupby('CCY Pair', observed=True)['Notional'].agg(['size', 'sum'])
+        assert result.by_pair['Orders'].to_dict() == expected_by_pair['size'].to_dict()
+        assert result.by_pair['Notional'].to_dict() == expected_by_pair['sum'].to_dict()
+
+
+def test_descending_keeps_ties_in_book_order(book):
+    rows = query_orders(OrderIndex(book), sort_by='Notional', ascending=False, page_size=len(book)).rows
+    largest = rows[rows['Notional'] == 5e6]
+    assert list(largest.index) == sorted(largest.index)
+    # Missing levels sort last in both directions
+    for ascending in (True, False):
+        levels = query_orders(OrderIndex(book), sort_by='Level', ascending=ascending, page_size=len(book)).rows['Level']
+        assert levels.isna().to_numpy()[-levels.isna().sum():].all()
+
+
+def test_segmented_book_matches_live_rows(book):
+    index, live = segmented(book)
+    assert len(index) == len(live)
+    pd.testing.assert_frame_equal(index.frame, live, check_categorical=False, check_dtype=False)
+    assert index.frame['Client Name'].dtype == 'category'
+    assert index.values('Client Name') == ['Acme', 'Beta', 'Delta', 'Gamma']
+    by_pair, by_lp = index.summary()
+    assert by_lp['Orders'].to_dict() == live.groupby('Liquidity Provider', observed=True).size().to_dict()
+    assert by_pair['Notional'].to_dict() == live.groupby('CCY Pair', observed=True)['Notional'].sum().to_dict()
+    # Positions number every base row, removed or not, then the tail rows
+    picks = [len(index) - 1, 3, 200, 0]
+    assert list(index.take(index.sort('Order ID')[picks]).index) == list(live.index[picks])
+
+
+def test_page_is_clamped_and_empty_results_have_one_page(book):
+    index = OrderIndex(book)
+    last = query_orders(index, page=99, page_size=100)
+    assert (last.page, last.pages, len(last.rows)) == (3, 3, 40)
+    assert query_orders(index, page=0).page == 1
+    empty = query_orders(index, {'CCY Pair': ['AUDUSD']})
+    assert (empty.total, empty.page, empty.pages, len(empty.rows)) == (0, 1, 1, 0)
+
+
+def test_values_leave_out_unused_categories(book):
+    index = OrderIndex(book[book['CCY Pair'] != 'USDJPY'])
+    assert index.values('CCY Pair') == ['EURUSD', 'GBPUSD']
+
+
+def test_with_market_adds_spot_and_distance(book):
+    snapshot = MarketSnapshot('EURUSD', 0, 1.0, ('1m',), (0.0,), (0.1,))
+    rows = with_market(book.head(20), lambda pair: snapshot if pair == 'EURUSD' else None)
+    eurusd = rows['CCY Pair'] == 'EURUSD'
+    assert (rows.loc[eurusd, 'Spot'] == 1.0).all() and rows.loc[~eurusd, 'Spot'].isna().all()
+    assert np.allclose(rows.loc[eurusd, 'Distance to Level (%)'].dropna(),
+                       (rows.loc[eurusd, 'Level'].dropna() - 1) * 100)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from pricing import (MarketSnapshot, digital, knock_in, market_for_tenor, premium, price_grid, price_structures,
+                     tenor_to_years, vanilla)
+
+SPOT, FORWARD, YEARS, VOL, RATE = 1.0, 1.001, 1 / 12, 0.09, 0.02
+DISCOUNT = np.exp(-RATE * YEARS)
+
+# Strikes for each structure, as used to check the closed forms against Monte Carlo
+CASES = {
+    'call spread': [1.0, 1.03],
+    'put spread': [1.0, 0.97],
+    'call spread RKI': [1.0, 1.03, 0.97],
+    'put spread RKI': [1.0, 0.97, 1.03],
+    'digital': [1.02],
+    'call ERKO': [1.0, 1.04],
+    'put ERKO': [1.0, 0.96],
+    'digi risk reversal': [1.0, 1.03, 0.96],
+}
+
+
+def test_tenor_to_years():
+    assert tenor_to_years('1y') == 1.0
+    assert tenor_to_years('6m') == pytest.approx(0.5)
+    assert tenor_to_years(' 2W ') == pytest.approx(14 / 365)
+    with pytest.raises(ValueError):
+        tenor_to_years('1q')
+
+
+def test_market_for_tenor_interpolates_points_and_variance():
+    snapshot = MarketSnapshot('USDJPY', 0, 150.0, ('1m', '3m'), (-50.0, -150.0), (0.10, 0.12))
+    spot, forward, vol, years = market_for_tenor(snapshot, '2m')
+    assert spot == 150.0
+    assert forward == pytest.approx(150.0 - 1.0)
+    assert vol ** 2 * years == pytest.approx((0.10 ** 2 / 12 + 0.12 ** 2 / 4) / 2)
+
+
+def test_put_call_parity():
+    call = vanilla(FORWARD, 1.01, YEARS, VOL, DISCOUNT, True)
+    put = vanilla(FORWARD, 1.01, YEARS, VOL, DISCOUNT, False)
+    assert call - put == pytest.approx(DISCOUNT * (FORWARD - 1.01))
+
+
+def test_digitals_sum_to_discount():
+    call = digital(FORWARD, 1.01, YEARS, VOL, DISCOUNT, True)
+    put = digital(FORWARD, 1.01, YEARS, VOL, DISCOUNT, False)
+    assert call + put == pytest.approx(DISCOUNT)
+
+
+def test_knock_in_limits():
+    spot, forward = np.array([SPOT]), np.array([FORWARD])
+    vanilla_call = vanilla(forward, 1.0, YEARS, VOL, DISCOUNT, True)[0]
+    # A breached barrier is the vanilla, a barrier out of reach is worthless
+    assert knock_in(spot, forward, 1.0, 1.01, YEARS, VOL, DISCOUNT, True)[0] <= vanilla_call
+    assert knock_in(spot, forward, 1.0, 1.0, YEARS, VOL, DISCOUNT, True)[0] == pytest.approx(vanilla_call)
+    assert knock_in(spot, forward, 1.0, 0.5, YEARS, VOL, DISCOUNT, True)[0] == pytest.approx(0.0, abs=1e-12)
+    assert knock_in(spot, forward, 1.0, 2.0, YEARS, VOL, DISCOUNT, False)[0] == pytest.approx(0.0, abs=1e-12)
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_closed_form_matches_monte_carlo(name):
+    strikes = np.array([CASES[name]])
+    closed = price_structures(name, strikes, SPOT, FORWARD, YEARS, VOL, RATE)
+    simulated = price_structures(name, strikes, SPOT, FORWARD, YEARS, VOL, RATE, method='monte carlo')
+    assert closed['cost'][0] == pytest.approx(simulated['cost'][0], abs=2.5)
+
+
+def test_monte_carlo_prices_rows_independently():
+    strikes = np.array([CASES['call spread RKI'], [1.0, 1.02, 0.98], CASES['call spread RKI']])
+    batch = premium('call spread RKI', SPOT, FORWARD, strikes, YEARS, VOL, DISCOUNT, method='monte carlo')
+    single = premium('call spread RKI', SPOT, FORWARD, strikes[1:2], YEARS, VOL, DISCOUNT, method='monte carlo')
+    assert batch[0] == batch[2]
+    assert batch[1] == pytest.approx(single[0])
+
+
+def test_price_grid_caches_per_snapshot():
+    snapshot = MarketSnapshot('EURUSD', 1, 1.08, ('1m',), (10.0,), (0.08,))
+    strikes = [[1.08, 1.1]]
+    first = price_grid(snapshot, '1m', 'call spread', strikes)
+    assert price_grid(snapshot, '1m', 'call spread', strikes) is first
+    moved = price_grid(snapshot._replace(timestamp=2, spot=1.09), '1m', 'call spread', strikes)
+    assert moved is not first
+    assert moved['cost'][0] > first['cost'][0]
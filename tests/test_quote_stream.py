@@ -0,0 +1,72 @@
+import asyncio
+
+import pandas as pd
+
+from helpers import order
+from order_store import OrderStore
+from quote_stream import LevelIndex, QuoteService, Tick, parse_tick, replay_file
+
+
+def test_level_index_between():
+    frame = pd.DataFrame({'CCY Pair': ['EURUSD', 'EURUSD', 'USDJPY', 'EURUSD'],
+                          'Level': [1.09, 1.07, 150.0, None]}, index=[1, 2, 3, 4])
+    index = LevelIndex(frame)
+    order_ids, levels = index.between('EURUSD', 1.06, 1.08)
+    assert list(order_ids) == [2] and list(levels) == [1.07]
+    assert list(index.between('EURUSD', 1.0, 2.0)[0]) == [2, 1]
+    assert len(index.between('GBPUSD', 0, 10)[0]) == 0
+
+
+def test_parse_tick():
+    assert parse_tick('2024-01-02T10:00:00,EURUSD,1.0850,1.0852\n') == Tick('2024-01-02T10:00:00', 'EURUSD',
+                                                                            1.085, 1.0852)
+
+
+def test_replay_file_skips_header(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text("timestamp,pair,bid,ask\nt1,EURUSD,1.0,1.0002\nt2,USDJPY,150.0,150.02\n")
+
+    async def collect():
+        return [tick async for tick in replay_file(str(path))]
+
+    assert [tick.pair for tick in asyncio.run(collect())] == ['EURUSD', 'USDJPY']
+
+
+def test_fills_and_near_alerts(journal):
+    level_order, far_order = journal.append([order(level=1.0850), order(level=1.2000)])
+    service = QuoteService(OrderStore(journal, poll_interval=0), alert_pips=5.0, index_refresh=0)
+
+    service.on_tick(Tick('t1', 'EURUSD', 1.0800, 1.0800))
+    assert service.recent_events() == []
+    service.on_tick(Tick('t2', 'EURUSD', 1.0847, 1.0847))
+    near, = service.recent_events()
+    assert (near.kind, near.order_id) == ('near', level_order)
+    assert round(near.distance_pips, 6) == -3.0
+
+    # Still inside the window: no repeat alert; crossing the level fills it once
+    service.on_tick(Tick('t3', 'EURUSD', 1.0848, 1.0848))
+    service.on_tick(Tick('t4', 'EURUSD', 1.0860, 1.0860))
+    service.on_tick(Tick('t5', 'EURUSD', 1.0840, 1.0840))
+    kinds = [(event.kind, event.order_id) for event in service.recent_events()]
+    assert kinds == [('fill', level_order), ('near', level_order)]
+    assert all(event.order_id != far_order for event in service.events)
+
+
+def test_near_alert_rearms_after_leaving_window(journal):
+    order_id, = journal.append([order(level=1.0850)])
+    service = QuoteService(OrderStore(journal, poll_interval=0), alert_pips=5.0, index_refresh=0)
+    for mid in (1.0847, 1.0800, 1.0846):
+        service.on_tick(Tick('t', 'EURUSD', mid, mid))
+    assert [event.kind for event in service.events] == ['near', 'near']
+
+
+def test_start_sets_alert_distance_for_the_feed(journal, tmp_path):
+    journal.append([order(level=1.0850)])
+    path = tmp_path / "ticks.csv"
+    path.write_text("t1,EURUSD,1.0830,1.0830\n")
+    service = QuoteService(OrderStore(journal, poll_interval=0), alert_pips=5.0)
+    service.start(lambda: replay_file(str(path)), alert_pips=25.0)
+    service._thread.join(timeout=5)
+    assert service.alert_pips == 25.0
+    assert service.ticks == 1
+    assert [event.kind for event in service.events] == ['near']
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+import risk
+from helpers import order
+from order_store import OrderStore
+from pricing import MarketSnapshot
+from risk import RiskBook, parse_structure
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Buy 1m 150/155 call spread RKI 145', ('call spread RKI', (150.0, 155.0, 145.0), '1m', 1)),
+    ('Sell 2W put spread 1.08 / 1.05', ('put spread', (1.08, 1.05), '2w', -1)),
+    ('put ERKO 1.08 1.05 3m', ('put ERKO', (1.08, 1.05), '3m', 1)),
+    ('1y digital 0.65', ('digital', (0.65,), '1y', 1)),
+])
+def test_parse_structure(text, expected):
+    assert tuple(parse_structure(text)) == expected
+
+
+@pytest.mark.parametrize('text', [None, '', 'call spread 150/155', 'Buy 1m 150 call spread', 'Buy 1m 150/155 strangle'])
+def test_parse_structure_rejects(text):
+    assert parse_structure(text) is None
+
+
+# Market data holding one snapshot per pair that tests can move
+class Market:
+    def __init__(self, **spots):
+        self.snapshots = {pair: MarketSnapshot(pair, 1, spot, ('1m', '3m'), (10.0, 30.0), (0.1, 0.1))
+                          for pair, spot in spots.items()}
+
+    def latest(self, pair):
+        return self.snapshots.get(pair)
+
+    def move(self, pair, spot):
+        snapshot = self.snapshots[pair]
+        self.snapshots[pair] = snapshot._replace(timestamp=snapshot.timestamp + 1, spot=spot)
+
+
+@pytest.fixture
+def priced(monkeypatch):
+    calls = []
+    order_greeks = risk.order_greeks
+    monkeypatch.setattr(risk, 'order_greeks', lambda orders, snapshot_of: (calls.append(len(orders)),
+                                                                         order_greeks(orders, snapshot_of))[1])
+    return calls
+
+
+def assert_ladders_match(book, expected):
+    for key, ladder in book.ladders.items():
+        np.testing.assert_allclose(ladder.sort_index().to_numpy(float),
+                                   expected.ladders[key].sort_index().to_numpy(float))
+
+
+def test_update_matches_full_reprice(journal):
+    market = Market(EURUSD=1.08, USDJPY=150.0)
+    store = OrderStore(journal, poll_interval=0)
+    acme, beta = journal.append([order('Acme', Structure='Buy 1m 1.08/1.10 call spread'),
+                                 order('Beta', pair='USDJPY', Structure='Sell 3m 150/145 put spread RKI 155')])
+    book = RiskBook(store, market)
+
+    journal.append([order('Gamma', pair='USDJPY', Structure='Buy 1m 151/155 call spread')])
+    journal.remove([acme])
+    market.move('USDJPY', 151.0)
+    book.update()
+    assert_ladders_match(book, RiskBook(store, market))
+    assert book.greeks['Priced'].sum() == 2
+
+
+def test_noop_update_reprices_nothing(journal, priced):
+    market = Market(EURUSD=1.08)
+    store = OrderStore(journal, poll_interval=0)
+    journal.append([order(Structure='free text the parser cannot read')] * 3)
+    book = RiskBook(store, market)
+    book.update()
+    book.update()
+    assert priced == [0, 3]
+    assert not book.greeks['Priced'].any()
+
+    market.move('EURUSD', 1.09)
+    book.update()
+    assert priced == [0, 3, 3]
+
+
+def test_updates_across_consolidations_match_full_reprice(journal, monkeypatch):
+    monkeypatch.setattr(risk, 'TAIL_LIMIT', 4)
+    market = Market(EURUSD=1.08, USDJPY=150.0)
+    store = OrderStore(journal, poll_interval=0, tail_limit=6)
+    structures = ['Buy 1m 1.08/1.10 call spread', 'Sell 3m 150/145 put spread RKI 155', 'not a structure']
+    journal.append([order('Acme', Structure=structures[0]), order('Beta', pair='USDJPY', Structure=structures[1])])
+    book = RiskBook(store, market)
+    rng = np.random.default_rng(5)
+    for step in range(10):
+        journal.append([order(rng.choice(['Acme', 'Beta', 'Gamma']), pair=rng.choice(['EURUSD', 'USDJPY']),
+                              Structure=rng.choice(structures)) for _ in range(3)])
+        live = store.refresh().frame.index
+        journal.remove(list(rng.choice(live, size=2, replace=False)))
+        if step % 3 == 0:
+            market.move('EURUSD', 1.08 + step / 1000)
+        book.update()
+        expected = RiskBook(store, market)
+        assert_ladders_match(book, expected)
+        assert sorted(book.greeks.index) == sorted(expected.greeks.index)
+        assert book.unpriced == int((~expected.greeks['Priced']).sum())
+
+
+def test_update_prices_only_the_delta(journal, priced):
+    market = Market(EURUSD=1.08)
+    store = OrderStore(journal, poll_interval=0)
+    journal.append([order()] * 5)
+    book = RiskBook(store, market)
+    first, = journal.append([order('Beta')])
+    journal.append([order('Gamma')])
+    journal.remove([first])
+    book.update()
+    assert priced == [0, 5, 1]
+    assert len(book.greeks) == 6 and first not in book.greeks.index
+
+
+def test_update_reprices_after_the_store_reloads(journal, priced):
+    market = Market(EURUSD=1.08)
+    store = OrderStore(journal, poll_interval=0)
+    removed, = journal.append([order()])
+    book = RiskBook(store, market)
+    journal.remove([removed])
+    journal.append([order('Beta')])
+    journal.compact()
+    book.update()
+    assert priced == [0, 1, 1]
+    assert list(book.greeks['Client Name']) == ['Beta']
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from structures import IDEA_COLUMNS, PAYOFFS, STRUCTURES, evaluate, evaluate_ideas, generate_ideas
+
+
+def test_rki_quotes_on_barrier_but_pays_spread_width():
+    evaluated = evaluate('call spread RKI', [[1.0, 1.03, 0.96]], [50])
+    assert evaluated['leverage'][0] == pytest.approx(8.0)
+    assert evaluated['quoted_width'][0] == pytest.approx(0.04)
+    assert evaluated['max_payout'][0] == pytest.approx(0.03)
+
+
+def test_zero_cost_or_strike_has_no_leverage():
+    evaluated = evaluate('call spread', [[1.0, 1.03], [0.0, 1.03]], [0, 50])
+    assert list(evaluated['leverage']) == [0.0, 0.0]
+
+
+def test_evaluate_ideas_tolerates_missing_columns():
+    ideas = pd.DataFrame([{'Structure': 'call spread RKI', 'Strike 1': 1.0, 'Strike 2': 1.03, 'Cost': 50},
+                          {'Structure': 'call spread', 'Strike 1': 1.0, 'Strike 2': 1.03, 'Cost': '50'},
+                          {'Structure': 'strangle', 'Strike 1': 1.0, 'Cost': 50}])
+    ranked = evaluate_ideas(ideas)
+    assert list(ranked.columns[:len(IDEA_COLUMNS)]) == IDEA_COLUMNS
+    assert list(ranked['Structure']) == ['call spread', 'call spread RKI', 'strangle']
+    assert ranked['Leverage'].iloc[0] == pytest.approx(6.0)
+    assert ranked['Leverage'].iloc[1:].isna().all()
+    assert evaluate_ideas(pd.DataFrame([{'foo': 1}]))['Leverage'].isna().all()
+
+
+def test_generate_ideas_across_pairs():
+    grids = [np.arange(0.99, 1.0101, 0.01), np.arange(0.99, 1.0101, 0.01)]
+    ideas = generate_ideas({'EURUSD': 1.1, 'USDJPY': 150.0}, 'call spread', grids)
+    # Only combinations with the second strike above the first pay on a call spread
+    assert len(ideas) == 2 * 3
+    assert (ideas['Strike 2'] > ideas['Strike 1']).all()
+    assert ideas.loc[ideas['CCY Pair'] == 'USDJPY', 'Strike 1'].min() == pytest.approx(148.5)
+    assert ideas['Cost'].isna().all()
+    with pytest.raises(ValueError):
+        generate_ideas({'EURUSD': 1.1}, 'call spread RKI', grids)
+
+
+def test_every_structure_has_a_payoff():
+    assert set(PAYOFFS) == set(STRUCTURES)